@@ -0,0 +1,221 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy
+
+import csfml
+import csfml.graphics
+import csfml.system
+
+class LoopMode(csfml.system.Enum):
+    Once = 0
+    Repeat = 1
+    PingPong = 2
+
+class Clip(object):
+    # A sequence of IntRect frames. `durations` is either one number for every
+    # frame or one per frame, in seconds.
+
+    def __init__(self, frames, durations, loop=LoopMode.Repeat):
+        self.frames = [csfml.graphics.IntRect(f.left, f.top, f.width, f.height) for f in frames]
+        if not self.frames:
+            raise ValueError("a clip needs at least one frame")
+        if isinstance(durations, (int, float)):
+            durations = [durations] * len(self.frames)
+        if len(durations) != len(self.frames):
+            raise ValueError("expected %d frame durations, got %d" % (len(self.frames), len(durations)))
+        self.durations = numpy.array(durations, numpy.float64)
+        if (self.durations < 0).any():
+            raise ValueError("frame durations can't be negative")
+        self.loop = loop
+
+    @property
+    def duration(self):
+        return float(self.durations.sum())
+
+class Animation(object):
+    # A sprite playing a clip in an Animator. Stays valid until stopped.
+
+    def __init__(self, animator, sprite, clip):
+        self.animator = animator
+        self.sprite = sprite
+        self.clip = clip
+        self.index = -1
+
+    def _get(self, array):
+        if self.index < 0:
+            raise ValueError("animation is not playing")
+        return array[self.index]
+
+    def _set(self, array, value):
+        if self.index < 0:
+            raise ValueError("animation is not playing")
+        array[self.index] = value
+
+    time = property(lambda self: float(self._get(self.animator.time)),
+                    lambda self, value: self._set(self.animator.time, value))
+    speed = property(lambda self: float(self._get(self.animator.speed)),
+                     lambda self, value: self._set(self.animator.speed, value))
+
+    @property
+    def frame(self):
+        return int(self._get(self.animator.frame)) - self.animator._first_frames[self.clip]
+
+    @property
+    def finished(self):
+        return bool(self._get(self.animator.finished))
+
+    @property
+    def paused(self):
+        return not self._get(self.animator.playing)
+
+    def pause(self):
+        self._set(self.animator.playing, False)
+
+    def resume(self):
+        self._set(self.animator.playing, not self.finished)
+
+    def stop(self):
+        self.animator.stop(self)
+
+class Animator(object):
+    # Per-instance state lives in parallel NumPy arrays with the playing
+    # instances packed at the front, like ParticleSystem. The frames of every
+    # clip in use are laid end to end on one timeline, so update() finds the
+    # current frame of all instances with a single searchsorted and only calls
+    # set_texture_rect for sprites whose frame actually changed.
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.updates = 0
+        self._resize(capacity)
+        self._animations = []
+        self._by_sprite = {}
+        self._clips = []
+        self._first_frames = {}
+        self._rects = []
+        self._ends = numpy.zeros(0, numpy.float64)
+        self._clip_bases = numpy.zeros(0, numpy.float64)
+        self._clip_durations = numpy.zeros(0, numpy.float64)
+        self._clip_last = numpy.zeros(0, numpy.intp)
+        self._clip_modes = numpy.zeros(0, numpy.int8)
+
+    def _resize(self, capacity):
+        def grow(old, dtype, fill):
+            new = numpy.full(capacity, fill, dtype)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            return new
+        self.capacity = capacity
+        self.time = grow(getattr(self, 'time', None), numpy.float64, 0.0)
+        self.speed = grow(getattr(self, 'speed', None), numpy.float64, 1.0)
+        self.playing = grow(getattr(self, 'playing', None), numpy.bool_, False)
+        self.finished = grow(getattr(self, 'finished', None), numpy.bool_, False)
+        self.clip = grow(getattr(self, 'clip', None), numpy.intp, 0)
+        self.frame = grow(getattr(self, 'frame', None), numpy.intp, -1)
+
+    def _arrays(self):
+        return (self.time, self.speed, self.playing, self.finished, self.clip, self.frame)
+
+    def _clip_id(self, clip):
+        try:
+            return self._clips.index(clip)
+        except ValueError:
+            pass
+        self._clips.append(clip)
+        self._first_frames[clip] = len(self._rects)
+        self._rects.extend(clip.frames)
+        base = self._ends[-1] if len(self._ends) else 0.0
+        self._ends = numpy.concatenate((self._ends, base + numpy.cumsum(clip.durations)))
+        self._clip_bases = numpy.append(self._clip_bases, base)
+        self._clip_durations = numpy.append(self._clip_durations, clip.duration)
+        self._clip_last = numpy.append(self._clip_last, len(self._rects) - 1)
+        self._clip_modes = numpy.append(self._clip_modes, clip.loop)
+        return len(self._clips) - 1
+
+    def play(self, sprite, clip, speed=1.0, time=0.0):
+        # Playing a new clip on a sprite that's already animated replaces it.
+        animation = self._by_sprite.get(id(sprite))
+        if animation is None:
+            if self.count == self.capacity:
+                self._resize(self.capacity * 2)
+            animation = Animation(self, sprite, clip)
+            animation.index = self.count
+            self._animations.append(animation)
+            self._by_sprite[id(sprite)] = animation
+            self.count += 1
+        animation.clip = clip
+        i = animation.index
+        self.clip[i] = self._clip_id(clip)
+        self.time[i] = time
+        self.speed[i] = speed
+        self.playing[i] = True
+        self.finished[i] = False
+        self.frame[i] = -1
+        return animation
+
+    def stop(self, animation):
+        i = animation.index
+        if i < 0:
+            return
+        last = self.count - 1
+        if i != last:
+            for array in self._arrays():
+                array[i] = array[last]
+            moved = self._animations[last]
+            moved.index = i
+            self._animations[i] = moved
+        self._animations.pop()
+        del self._by_sprite[id(animation.sprite)]
+        animation.index = -1
+        self.count -= 1
+
+    def get_animation(self, sprite):
+        return self._by_sprite.get(id(sprite))
+
+    def update(self, dt):
+        n = self.count
+        self.updates = 0
+        if not n:
+            return 0
+        time = self.time[:n]
+        time += dt * self.speed[:n] * self.playing[:n]
+
+        clip = self.clip[:n]
+        duration = self._clip_durations[clip]
+        mode = self._clip_modes[clip]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            repeat = numpy.mod(time, duration)
+            bounce = numpy.mod(time, 2 * duration)
+        bounce = numpy.where(bounce < duration, bounce, 2 * duration - bounce)
+        local = numpy.where(mode == LoopMode.Repeat, repeat,
+                            numpy.where(mode == LoopMode.PingPong, bounce, numpy.clip(time, 0.0, duration)))
+        local = numpy.nan_to_num(local)
+
+        frame = numpy.searchsorted(self._ends, self._clip_bases[clip] + local, side='right')
+        numpy.minimum(frame, self._clip_last[clip], out=frame)
+
+        done = (mode == LoopMode.Once) & ((time >= duration) | (time < 0))
+        self.finished[:n] |= done
+        self.playing[:n] &= ~done
+
+        changed = numpy.flatnonzero(frame != self.frame[:n])
+        self.frame[:n] = frame
+        rects = self._rects
+        animations = self._animations
+        for i in changed.tolist():
+            animations[i].sprite.set_texture_rect(rects[frame[i]])
+        self.updates = len(changed)
+        return self.updates
@@ -0,0 +1,153 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import queue
+import threading
+
+import csfml
+import csfml.graphics
+import csfml.window
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class FrameCapture(object):
+    def __init__(self, window, consumer, ring_size=3, delay=1, max_queued=2, as_array=True):
+        if not 0 < delay < ring_size:
+            raise ValueError("delay must be at least 1 and less than ring_size")
+        self.window = window
+        self.consumer = consumer
+        self.delay = delay
+        self.as_array = as_array and numpy is not None
+        self.frame = 0
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self._error = None
+        self._ring_size = ring_size
+        self._ring = []
+        self._frames = [None] * ring_size
+        self._index = 0
+        self._width = self._height = 0
+        self._queue = queue.Queue(max_queued)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _update(self, texture):
+        if isinstance(self.window, csfml.window.Window):
+            texture.update_from_window(self.window, 0, 0)
+        else:
+            texture.update_from_render_window(self.window, 0, 0)
+
+    def _allocate(self, width, height):
+        self.dropped += sum(1 for f in self._frames if f is not None)
+        self._ring = [csfml.graphics.Texture(width, height) for i in range(self._ring_size)]
+        self._frames = [None] * self._ring_size
+        self._index = 0
+        self._width = width
+        self._height = height
+
+    def capture(self):
+        # Call after drawing and before display(). The copy into the ring
+        # texture stays on the GPU; only the slot captured `delay` frames ago
+        # is read back, by which time its copy has long since completed.
+        size = self.window.get_size()
+        if size.x != self._width or size.y != self._height:
+            self._allocate(size.x, size.y)
+
+        slot = self._index
+        self._update(self._ring[slot])
+        self._frames[slot] = self.frame
+        self.captured += 1
+
+        ready = (slot - self.delay) % self._ring_size
+        if self._frames[ready] is not None:
+            self._read_back(ready)
+
+        self._index = (slot + 1) % self._ring_size
+        self.frame += 1
+
+    def _read_back(self, slot, block=False):
+        frame = self._frames[slot]
+        self._frames[slot] = None
+        if not block and self._queue.full():
+            # Don't even pay for the readback if the consumer can't take it.
+            self.dropped += 1
+            return
+        image = self._ring[slot].copy_to_image()
+        try:
+            self._queue.put((frame, image), block)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, block=True):
+        for i in range(self._ring_size):
+            slot = (self._index + i) % self._ring_size
+            if self._frames[slot] is not None:
+                self._read_back(slot, block)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, image = item
+            size = image.get_size()
+            nbytes = size.x * size.y * 4
+            if self.as_array:
+                data = numpy.empty((size.y, size.x, 4), numpy.uint8)
+                ctypes.memmove(data.ctypes.data, image.get_pixels_ptr(), nbytes)
+            else:
+                data = ctypes.string_at(image.get_pixels_ptr(), nbytes)
+            del image, item
+            try:
+                self.consumer(frame, data)
+            except Exception as e:
+                # Keep draining so capture() and close() never block on a
+                # full queue; the first error is re-raised by close().
+                self.failed += 1
+                if self._error is None:
+                    self._error = e
+                continue
+            self.delivered += 1
+
+    def get_stats(self):
+        return {'captured': self.captured,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'queued': self._queue.qsize()}
+
+    def close(self):
+        if self._thread is not None:
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._ring = []
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
@@ -13,13 +13,26 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import concurrent.futures
 import ctypes
+import os
+import queue
+import tempfile
+import threading
 
 import csfml
+import csfml.memory
 import csfml.system
+import csfml.telemetry
 import csfml.window
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 cgraphics = ctypes.CDLL(csfml.module_format % 'graphics')
+_telemetry = csfml.telemetry.telemetry
 
 class BlendMode(csfml.system.Enum):
     BlendAlpha = 0
@@ -45,6 +58,163 @@ class Color(ctypes.Structure):
     def __add__(self, oth):
         return cgraphics.sfColor_add(self, oth)
 
+class _Resource(ctypes.c_void_p):
+    _owned = True
+
+    @classmethod
+    def _free(cls, handle):
+        csfml.memory.registry.forget(handle)
+        cls._destroy_func(handle)
+
+    # Instances read out of a struct field (like RenderStates.texture) are
+    # views of the struct's memory and never own the handle.
+
+    def __del__(self):
+        if self._b_base_ is None and self.value and self._owned:
+            csfml.system.release_queue.defer(self._free, self.value)
+            self.value = 0
+
+    def close(self):
+        if self._b_base_ is None and self.value and self._owned:
+            self._free(self.value)
+            self.value = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _combine_transforms(a, b):
+    a = a.matrix
+    b = b.matrix
+    result = Transform()
+    m = result.matrix
+    for row in range(3):
+        for col in range(3):
+            m[row * 3 + col] = a[row * 3] * b[col] + a[row * 3 + 1] * b[3 + col] + a[row * 3 + 2] * b[6 + col]
+    return result
+
+class DisplayList(object):
+    # A recorded sequence of draws that can be replayed as a whole. Sprites
+    # are baked into quads at record time, and consecutive sprites that share
+    # a texture, blend mode and shader become one draw_primitives call, so
+    # replay costs one native call per batch rather than one per sprite. Other
+    # drawables are kept as-is and drawn in order.
+    #
+    # Changes to recorded sprites aren't picked up until invalidate() is
+    # called for them; only the batches containing them are rebuilt.
+
+    def __init__(self):
+        self._entries = []
+        self._batches = None
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        del self._entries[:]
+        self._batches = None
+
+    def add(self, drawable, states=None):
+        if states is None:
+            states = RenderStates()
+        self._entries.append((drawable, states))
+        self._batches = None
+
+    def _batch_key(self, drawable, states):
+        if not isinstance(drawable, Sprite):
+            return None
+        texture = drawable.get_texture()
+        if not texture.value:
+            return None
+        return (texture.value, states.blend_mode.value, states.shader.value or 0)
+
+    def _compile(self):
+        batches = []
+        current_key = None
+        for index, (drawable, states) in enumerate(self._entries):
+            key = self._batch_key(drawable, states)
+            if key is None:
+                batches.append([None, [index], None])
+                current_key = None
+            elif key == current_key:
+                batches[-1][1].append(index)
+            else:
+                batches.append([key, [index], None])
+                current_key = key
+        self._batches = batches
+        self._dirty.clear()
+        for batch in batches:
+            if batch[0] is not None:
+                self._build_batch(batch)
+
+    def _build_batch(self, batch):
+        first_drawable, first_states = self._entries[batch[1][0]]
+        vertices = (Vertex * (4 * len(batch[1])))()
+        v = 0
+        for index in batch[1]:
+            sprite, states = self._entries[index]
+            m = _combine_transforms(states.transform, sprite.get_transform()).matrix
+            rect = sprite.get_texture_rect()
+            color = sprite.get_color()
+            width = float(abs(rect.width))
+            height = float(abs(rect.height))
+            left = float(rect.left)
+            top = float(rect.top)
+            right = left + rect.width
+            bottom = top + rect.height
+            for (x, y, u, tv) in ((0.0, 0.0, left, top), (0.0, height, left, bottom),
+                                  (width, height, right, bottom), (width, 0.0, right, top)):
+                vertex = vertices[v]
+                vertex.position.x = m[0] * x + m[1] * y + m[2]
+                vertex.position.y = m[3] * x + m[4] * y + m[5]
+                vertex.color = color
+                vertex.tex_coords.x = u
+                vertex.tex_coords.y = tv
+                v += 1
+        batch_states = RenderStates(first_states.blend_mode, Transform.identity,
+                                    first_drawable.get_texture(), first_states.shader)
+        batch[2] = (vertices, len(vertices), batch_states)
+
+    def invalidate(self, drawable=None):
+        if drawable is None or self._batches is None:
+            self._batches = None
+            return
+        for batch in self._batches:
+            for index in batch[1]:
+                if self._entries[index][0] is drawable:
+                    if batch[0] != self._batch_key(*self._entries[index]):
+                        # It can't stay in this batch any more, so regroup.
+                        self._batches = None
+                        return
+                    if batch[0] is not None:
+                        # Anything else is drawn as-is and has nothing cached.
+                        self._dirty.add(id(batch))
+                    break
+
+    def draw(self, target, states=None):
+        if self._batches is None:
+            self._compile()
+        elif self._dirty:
+            for batch in self._batches:
+                if batch[0] is not None and id(batch) in self._dirty:
+                    self._build_batch(batch)
+            self._dirty.clear()
+        for key, indices, compiled in self._batches:
+            if compiled is not None:
+                vertices, count, batch_states = compiled
+                if states is not None:
+                    batch_states = RenderStates(batch_states.blend_mode, states.transform, batch_states.texture, batch_states.shader)
+                target.draw_primitives(vertices, count, PrimitiveType.Quads, batch_states)
+            else:
+                drawable, entry_states = self._entries[indices[0]]
+                if states is not None:
+                    entry_states = RenderStates(entry_states.blend_mode, _combine_transforms(states.transform, entry_states.transform),
+                                                entry_states.texture, entry_states.shader)
+                target.draw(drawable, entry_states)
+
 class Drawable(ctypes.c_void_p):
     def draw(self, render_target, render_states):
         raise NotImplementedError()
@@ -69,7 +239,9 @@ class FloatRect(ctypes.Structure):
         if cgraphics.sfFloatRect_intersects(ctypes.byref(self), ctypes.byref(other), ctypes.byref(intersection)):
             return intersection
 
-class Font(ctypes.c_void_p):
+class Font(_Resource):
+    _data = None
+
     def __init__(self, filename):
         result = cgraphics.sfFont_createFromFile(filename)
         self.value = result.value
@@ -81,19 +253,18 @@ class Font(ctypes.c_void_p):
 
     @staticmethod
     def from_memory(data, size):
-        return cgraphics.sfFont_createFromMemory(data, size)
+        result = cgraphics.sfFont_createFromMemory(data, size)
+        result._data = data # sfFont reads from this buffer for as long as it exists
+        return result
 
     @staticmethod
     def from_stream(stream):
         return cgraphics.sfFont_createFromStream(stream)
 
     def copy(self):
-        return cgraphics.sfFont_copy(self)
-
-    def __del__(self):
-        if self.value != 0:
-            cgraphics.sfFont_destroy(self)
-            self.value = 0
+        result = cgraphics.sfFont_copy(self)
+        result._data = self._data # the copy shares the original's font data
+        return result
 
     def get_glyph(self, code_point, character_size, bold):
         return cgraphics.sfFont_getGlyph(self, code_point, character_size, bold)
@@ -109,7 +280,7 @@ class Font(ctypes.c_void_p):
         result._const = True
         return result
 
-class Image(ctypes.c_void_p):
+class Image(_Resource):
     def __init__(self, width, height):
         res = cgraphics.sfImage_create(width, height)
         self.value = res.value
@@ -138,14 +309,37 @@ class Image(ctypes.c_void_p):
     def copy(self):
         return cgraphics.sfImage_copy(self)
 
-    def __del__(self):
-        if self.value != 0:
-            cgraphics.sfImage_destroy(self)
-            self.value = 0
-
     def save_to_file(self, filename):
         if not cgraphics.sfImage_saveToFile(self, filename):
-            raise Exception("save failed")
+            raise IOError("failed to save image to %r" % filename)
+
+    def save_to_memory(self, format='png'):
+        if hasattr(cgraphics, 'sfImage_saveToMemory'):
+            buf = cgraphics.sfBuffer_create()
+            try:
+                if not cgraphics.sfImage_saveToMemory(self, buf, format.encode('ascii')):
+                    raise IOError("failed to encode image as %s" % format)
+                return ctypes.string_at(cgraphics.sfBuffer_getData(buf), cgraphics.sfBuffer_getSize(buf))
+            finally:
+                cgraphics.sfBuffer_destroy(buf)
+        # Older CSFML can only encode to a file, and picks the format from the extension.
+        fd, filename = tempfile.mkstemp(suffix='.' + format)
+        os.close(fd)
+        try:
+            self.save_to_file(os.fsencode(filename))
+            with open(filename, 'rb') as f:
+                return f.read()
+        finally:
+            os.unlink(filename)
+
+    # The async variants encode a private copy, so the caller is free to keep
+    # modifying (or destroy) this image while the worker runs.
+
+    def save_to_file_async(self, filename):
+        return _get_encoder_pool().submit(self.copy().save_to_file, filename)
+
+    def save_to_memory_async(self, format='png'):
+        return _get_encoder_pool().submit(self.copy().save_to_memory, format)
 
     def get_size(self):
         return cgraphics.sfImage_getSize(self)
@@ -183,6 +377,78 @@ class Image(ctypes.c_void_p):
     def flip_vertically(self):
         cgraphics.sfImage_flipVertically(self)
 
+_encoder_pool = None
+_encoder_pool_lock = threading.Lock()
+
+def _get_encoder_pool():
+    global _encoder_pool
+    with _encoder_pool_lock:
+        if _encoder_pool is None:
+            _encoder_pool = concurrent.futures.ThreadPoolExecutor(max(1, (os.cpu_count() or 2) - 1))
+        return _encoder_pool
+
+class ImageSequenceWriter(object):
+    def __init__(self, pattern, start=0, max_pending=4):
+        self.pattern = pattern
+        self.index = start
+        self.errors = []
+        self._error = None
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, image, copy=True, block=True, timeout=None):
+        # Blocks (or raises queue.Full) once max_pending frames are waiting,
+        # so a slow disk throttles the producer instead of piling up images.
+        if self._thread is None:
+            raise ValueError("writer is closed")
+        self._raise_error()
+        filename = self.pattern % self.index
+        if copy:
+            image = image.copy()
+        self._queue.put((image, filename), block, timeout)
+        self.index += 1
+        return filename
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            image, filename = item
+            try:
+                image.save_to_file(filename)
+            except IOError as e:
+                self.errors.append(e)
+            except Exception as e:
+                # Anything else is a bug rather than a failed save; keep
+                # draining so nothing blocks, and re-raise it in the caller.
+                if self._error is None:
+                    self._error = e
+            del image, item
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
 class IntRect(ctypes.Structure):
     _fields_ = [('left', ctypes.c_int), ('top', ctypes.c_int), ('width', ctypes.c_int), ('height', ctypes.c_int)]
 
@@ -208,9 +474,334 @@ class Glyph(ctypes.Structure):
                 ('bounds', IntRect),
                 ('texture_rect', IntRect)]
 
-RenderWindow = ctypes.c_void_p # FIXME
+class PrimitiveType(csfml.system.Enum):
+    Points = 0
+    Lines = 1
+    LinesStrip = 2
+    Triangles = 3
+    TrianglesStrip = 4
+    TrianglesFan = 5
+    Quads = 6
+
+class RenderWindow(ctypes.c_void_p):
+    release_queue = csfml.system.release_queue
+
+    release_budget = 0.002
+
+    def __init__(self, mode, title, style=csfml.window.Style.Default, settings=csfml.window.ContextSettings()):
+        result = cgraphics.sfRenderWindow_createUnicode(mode, csfml.window._to_utf32(title), style, ctypes.byref(settings))
+        self.value = result.value
+        result.value = 0
+        if self.value:
+            self._defer_releases(True)
+        self.states = RenderStates()
+
+    @staticmethod
+    def from_handle(handle, settings=csfml.window.ContextSettings()):
+        result = cgraphics.sfRenderWindow_createFromHandle(handle, ctypes.byref(settings))
+        if result.value:
+            result._defer_releases(True)
+        result.states = RenderStates()
+        return result
+
+    _deferring = False
+
+    _defer_releases = csfml.window.Window._defer_releases
+
+    def __del__(self):
+        if self.value != 0:
+            cgraphics.sfRenderWindow_destroy(self)
+            self.value = 0
+            self._defer_releases(False)
+
+    def close(self):
+        cgraphics.sfRenderWindow_close(self)
+        self._defer_releases(False)
+
+    def is_open(self):
+        return bool(cgraphics.sfRenderWindow_isOpen(self))
+
+    def get_settings(self):
+        return cgraphics.sfRenderWindow_getSettings(self)
+
+    settings = property(get_settings)
+
+    def poll_raw_event(self, event):
+        if cgraphics.sfRenderWindow_pollEvent(self, ctypes.byref(event)):
+            _telemetry.counters.events += 1
+            return True
+        return False
+
+    def wait_raw_event(self, event):
+        if cgraphics.sfRenderWindow_waitEvent(self, ctypes.byref(event)):
+            _telemetry.counters.events += 1
+            return True
+        return False
+
+    poll_event = csfml.window.Window.poll_event
+    wait_event = csfml.window.Window.wait_event
+
+    events = csfml.window.Window.events
+
+    def get_position(self):
+        return cgraphics.sfRenderWindow_getPosition(self)
+
+    def set_position(self, *position):
+        cgraphics.sfRenderWindow_setPosition(self, csfml.system._vector(csfml.system.Vector2i, position))
+
+    position = property(get_position, set_position)
+
+    def get_size(self):
+        return cgraphics.sfRenderWindow_getSize(self)
+
+    def set_size(self, *size):
+        cgraphics.sfRenderWindow_setSize(self, csfml.system._vector(csfml.system.Vector2u, size))
+
+    size = property(get_size, set_size)
+
+    def set_title(self, title):
+        cgraphics.sfRenderWindow_setUnicodeTitle(self, csfml.window._to_utf32(title))
+
+    def set_icon(self, width, height, pixels):
+        cgraphics.sfRenderWindow_setIcon(self, width, height, pixels)
+
+    def set_visible(self, visible):
+        cgraphics.sfRenderWindow_setVisible(self, visible)
+
+    def set_mouse_cursor_visible(self, visible):
+        cgraphics.sfRenderWindow_setMouseCursorVisible(self, visible)
+
+    def set_vertical_sync_enabled(self, enabled):
+        cgraphics.sfRenderWindow_setVerticalSyncEnabled(self, enabled)
+
+    def set_key_repeat_enabled(self, enabled):
+        cgraphics.sfRenderWindow_setKeyRepeatEnabled(self, enabled)
+
+    def set_active(self, active):
+        return bool(cgraphics.sfRenderWindow_setActive(self, active))
+
+    def display(self):
+        cgraphics.sfRenderWindow_display(self)
+        _telemetry.end_frame()
+        if self.release_queue:
+            self.release_queue.flush(self.release_budget)
+
+    def set_framerate_limit(self, limit):
+        cgraphics.sfRenderWindow_setFramerateLimit(self, limit)
+
+    def set_joystick_threshold(self, threshold):
+        cgraphics.sfRenderWindow_setJoystickThreshold(self, threshold)
+
+    def get_system_handle(self):
+        return cgraphics.sfRenderWindow_getSystemHandle(self)
+
+    def clear(self, color=None):
+        if color is None:
+            color = Color.black
+        cgraphics.sfRenderWindow_clear(self, color)
+
+    _view = None
+
+    def set_view(self, view):
+        cgraphics.sfRenderWindow_setView(self, view)
+        self._view = view
+
+    def get_view(self):
+        result = cgraphics.sfRenderWindow_getView(self)
+        if self._view is not None and self._view.value == result.value:
+            return self._view
+        result._owned = False
+        return result
+
+    view = property(get_view, set_view)
+
+    def get_default_view(self):
+        result = cgraphics.sfRenderWindow_getDefaultView(self)
+        result._owned = False
+        return result
+
+    def get_viewport(self, view):
+        return cgraphics.sfRenderWindow_getViewport(self, view)
+
+    def map_pixel_to_coords(self, point, view=None):
+        return cgraphics.sfRenderWindow_mapPixelToCoords(self, csfml.system._vector(csfml.system.Vector2i, (point,)), view)
+
+    def map_coords_to_pixel(self, point, view=None):
+        return cgraphics.sfRenderWindow_mapCoordsToPixel(self, csfml.system._vector(csfml.system.Vector2f, (point,)), view)
+
+    # `states` is a RenderStates allocated with the window. Modifying and
+    # passing it saves building a new one for every draw, and passing the
+    # same object again also reuses its converted pointer.
+
+    _last_states = None
+    _last_states_ref = None
+
+    def _states_ref(self, states):
+        if states is None:
+            return None
+        if states is not self._last_states:
+            self._last_states_ref = ctypes.byref(states)
+            self._last_states = states
+        return self._last_states_ref
+
+    def draw(self, drawable, states=None):
+        if isinstance(drawable, Sprite):
+            cgraphics.sfRenderWindow_drawSprite(self, drawable, self._states_ref(states))
+            _telemetry.counters.draw_calls += 1
+            _telemetry.counters.vertices += 4
+        else:
+            drawable.draw(self, states)
+
+    def draw_many(self, drawables, states=None):
+        # Same as calling draw() for each item, with the per-call setup
+        # hoisted out of the loop.
+        states_ref = None if states is None else ctypes.byref(states)
+        draw_sprite = cgraphics.sfRenderWindow_drawSprite
+        sprite = Sprite
+        sprites = 0
+        for drawable in drawables:
+            if isinstance(drawable, sprite):
+                draw_sprite(self, drawable, states_ref)
+                sprites += 1
+            else:
+                drawable.draw(self, states)
+        _telemetry.counters.draw_calls += sprites
+        _telemetry.counters.vertices += 4 * sprites
+
+    def draw_primitives(self, vertices, count, primitive_type, states=None):
+        cgraphics.sfRenderWindow_drawPrimitives(self, vertices, count, primitive_type, self._states_ref(states))
+        _telemetry.counters.draw_calls += 1
+        _telemetry.counters.vertices += count
+
+    def push_gl_states(self):
+        cgraphics.sfRenderWindow_pushGLStates(self)
+
+    def pop_gl_states(self):
+        cgraphics.sfRenderWindow_popGLStates(self)
+
+    def reset_gl_states(self):
+        cgraphics.sfRenderWindow_resetGLStates(self)
+
+    def capture(self):
+        return cgraphics.sfRenderWindow_capture(self)
+
+class RenderTexture(_Resource):
+    release_queue = csfml.system.release_queue
+
+    release_budget = 0.002
+
+    def __new__(cls, width, height, depth_buffer=False):
+        return cgraphics.sfRenderTexture_create(width, height, depth_buffer)
+
+    def __init__(self, width, height, depth_buffer=False):
+        self.states = RenderStates()
+
+    def get_size(self):
+        return cgraphics.sfRenderTexture_getSize(self)
+
+    size = property(get_size)
+
+    def set_active(self, active):
+        return bool(cgraphics.sfRenderTexture_setActive(self, active))
+
+    def display(self):
+        cgraphics.sfRenderTexture_display(self)
+        if self.release_queue:
+            self.release_queue.flush(self.release_budget)
+
+    def clear(self, color=None):
+        if color is None:
+            color = Color.black
+        cgraphics.sfRenderTexture_clear(self, color)
+
+    _view = None
+
+    def set_view(self, view):
+        cgraphics.sfRenderTexture_setView(self, view)
+        self._view = view
 
-class Shader(ctypes.c_void_p):
+    def get_view(self):
+        result = cgraphics.sfRenderTexture_getView(self)
+        if self._view is not None and self._view.value == result.value:
+            return self._view
+        result._owned = False
+        return result
+
+    view = property(get_view, set_view)
+
+    def get_default_view(self):
+        result = cgraphics.sfRenderTexture_getDefaultView(self)
+        result._owned = False
+        return result
+
+    def get_viewport(self, view):
+        return cgraphics.sfRenderTexture_getViewport(self, view)
+
+    def map_pixel_to_coords(self, point, view=None):
+        return cgraphics.sfRenderTexture_mapPixelToCoords(self, csfml.system._vector(csfml.system.Vector2i, (point,)), view)
+
+    def map_coords_to_pixel(self, point, view=None):
+        return cgraphics.sfRenderTexture_mapCoordsToPixel(self, csfml.system._vector(csfml.system.Vector2f, (point,)), view)
+
+    _states_ref = RenderWindow._states_ref
+    _last_states = None
+    _last_states_ref = None
+
+    def draw(self, drawable, states=None):
+        if isinstance(drawable, Sprite):
+            cgraphics.sfRenderTexture_drawSprite(self, drawable, self._states_ref(states))
+            _telemetry.counters.draw_calls += 1
+            _telemetry.counters.vertices += 4
+        else:
+            drawable.draw(self, states)
+
+    def draw_many(self, drawables, states=None):
+        states_ref = None if states is None else ctypes.byref(states)
+        draw_sprite = cgraphics.sfRenderTexture_drawSprite
+        sprite = Sprite
+        sprites = 0
+        for drawable in drawables:
+            if isinstance(drawable, sprite):
+                draw_sprite(self, drawable, states_ref)
+                sprites += 1
+            else:
+                drawable.draw(self, states)
+        _telemetry.counters.draw_calls += sprites
+        _telemetry.counters.vertices += 4 * sprites
+
+    def draw_primitives(self, vertices, count, primitive_type, states=None):
+        cgraphics.sfRenderTexture_drawPrimitives(self, vertices, count, primitive_type, self._states_ref(states))
+        _telemetry.counters.draw_calls += 1
+        _telemetry.counters.vertices += count
+
+    def push_gl_states(self):
+        cgraphics.sfRenderTexture_pushGLStates(self)
+
+    def pop_gl_states(self):
+        cgraphics.sfRenderTexture_popGLStates(self)
+
+    def reset_gl_states(self):
+        cgraphics.sfRenderTexture_resetGLStates(self)
+
+    def get_texture(self):
+        # The texture belongs to the render texture, so keep that alive for
+        # as long as the texture is.
+        result = cgraphics.sfRenderTexture_getTexture(self)
+        result._const = True
+        result._render_texture = self
+        return result
+
+    texture = property(get_texture)
+
+    def set_smooth(self, smooth):
+        cgraphics.sfRenderTexture_setSmooth(self, smooth)
+
+    def is_smooth(self):
+        return bool(cgraphics.sfRenderTexture_isSmooth(self))
+
+    smooth = property(is_smooth, set_smooth)
+
+class Shader(_Resource):
     def __init__(self):
         raise TypeError("use Shader.from_file, Shader.from_memory, or Shader.from_stream")
 
@@ -226,11 +817,6 @@ class Shader(ctypes.c_void_p):
     def from_stream(vertex_shader_stream, fragment_shader_stream):
         return cgraphics.sfShader_createFromStream(vertex_shader_stream, fragment_shader_stream)
 
-    def __del__(self):
-        if self.value != 0:
-            cgraphics.sfShader_destroy(self)
-            self.value = 0
-
     # FIXME: Make a "params" object so we can do e.g. 'shader.params.name = 2.0'?
 
     def set_float_parameter(self, name, x):
@@ -270,9 +856,7 @@ class Shader(ctypes.c_void_p):
     def is_available():
         return bool(cgraphics.sfShader_isAvailable())
 
-class Sprite(ctypes.c_void_p):
-    _owned = True
-
+class Sprite(_Resource):
     def __init__(self):
         result = cgraphics.sfSprite_create()
         self.value = result.value
@@ -281,22 +865,17 @@ class Sprite(ctypes.c_void_p):
     def copy(self):
         return cgraphics.sfSprite_copy(self)
 
-    def __del__(self):
-        if self.value != 0 and self._owned:
-            cgraphics.sfSprite_destroy(self)
-            self.value = 0
-
     def set_position(self, *position):
-        cgraphics.sfSprite_setPosition(self, csfml.system.Vector2f(*position))
+        cgraphics.sfSprite_setPosition(self, csfml.system._vector(csfml.system.Vector2f, position))
 
     def set_rotation(self, angle):
         cgraphics.sfSprite_setRotation(self, angle)
 
     def set_scale(self, *scale):
-        cgraphics.sfSprite_setScale(self, csfml.system.Vector2f(*scale))
+        cgraphics.sfSprite_setScale(self, csfml.system._vector(csfml.system.Vector2f, scale))
 
     def set_origin(self, *origin):
-        cgraphics.sfSprite_setOrigin(self, csfml.system.Vector2f(*origin))
+        cgraphics.sfSprite_setOrigin(self, csfml.system._vector(csfml.system.Vector2f, origin))
 
     def get_position(self):
         return cgraphics.sfSprite_getPosition(self)
@@ -319,13 +898,13 @@ class Sprite(ctypes.c_void_p):
     origin = property(get_origin, set_origin)
 
     def move(self, *offset):
-        cgraphics.sfSprite_move(self, csfml.system.Vector2f(*offset))
+        cgraphics.sfSprite_move(self, csfml.system._vector(csfml.system.Vector2f, offset))
 
     def rotate(self, angle):
         cgraphics.sfSprite_rotate(self, angle)
 
     def scale(self, *factors):
-        cgraphics.sfSprite_scale(self, csfml.system.Vector2f(*factors))
+        cgraphics.sfSprite_scale(self, csfml.system._vector(csfml.system.Vector2f, factors))
 
     def get_transform(self):
         return cgraphics.sfSprite_getTransform(self)
@@ -370,7 +949,7 @@ class Sprite(ctypes.c_void_p):
     def get_global_bounds(self):
         return cgraphics.sfSprite_getGlobalBounds(self)
 
-class Texture(ctypes.c_void_p):
+class Texture(_Resource):
     def __init__(self, width, height):
         result = cgraphics.sfTexture_create(width, height)
         self.value = result.value
@@ -379,7 +958,7 @@ class Texture(ctypes.c_void_p):
     @staticmethod
     def from_file(filename, area=None):
         if area is None:
-            area = POINTER(IntRect)()
+            area = ctypes.POINTER(IntRect)()
         else:
             area = ctypes.byref(area)
         return cgraphics.sfTexture_createFromFile(filename, area)
@@ -387,7 +966,7 @@ class Texture(ctypes.c_void_p):
     @staticmethod
     def from_memory(data, size, area=None):
         if area is None:
-            area = POINTER(IntRect)()
+            area = ctypes.POINTER(IntRect)()
         else:
             area = ctypes.byref(area)
         return cgraphics.sfTexture_createFromMemory(data, size, area)
@@ -395,7 +974,7 @@ class Texture(ctypes.c_void_p):
     @staticmethod
     def from_stream(stream, area=None):
         if area is None:
-            area = POINTER(IntRect)()
+            area = ctypes.POINTER(IntRect)()
         else:
             area = ctypes.byref(area)
         return cgraphics.sfTexture_createFromStream(stream, area)
@@ -403,7 +982,7 @@ class Texture(ctypes.c_void_p):
     @staticmethod
     def from_image(image, area=None):
         if area is None:
-            area = POINTER(IntRect)()
+            area = ctypes.POINTER(IntRect)()
         else:
             area = ctypes.byref(area)
         return cgraphics.sfTexture_createFromImage(image, area)
@@ -413,10 +992,9 @@ class Texture(ctypes.c_void_p):
 
     _const = False
 
-    def __del__(self):
-        if self.value != 0 and not self._const:
-            cgraphics.sfTexture_destroy(self)
-            self.value = 0
+    @property
+    def _owned(self):
+        return not self._const
 
     def get_size(self):
         return cgraphics.sfTexture_getSize(self)
@@ -440,21 +1018,35 @@ class Texture(ctypes.c_void_p):
         if self._const:
             raise TypeError("this texture is const")
         cgraphics.sfTexture_updateFromPixels(self, pixels, width, height, x, y)
+        _telemetry.counters.texture_uploads += 1
+        _telemetry.counters.upload_bytes += width * height * 4
 
     def update_from_image(self, image, x, y):
         if self._const:
             raise TypeError("this texture is const")
         cgraphics.sfTexture_updateFromImage(self, image, x, y)
+        _telemetry.counters.texture_uploads += 1
+        if _telemetry.enabled:
+            size = cgraphics.sfImage_getSize(image)
+            _telemetry.counters.upload_bytes += size.x * size.y * 4
 
     def update_from_window(self, window, x, y):
         if self._const:
             raise TypeError("this texture is const")
         cgraphics.sfTexture_updateFromWindow(self, window, x, y)
+        _telemetry.counters.texture_uploads += 1
+        if _telemetry.enabled:
+            size = window.get_size()
+            _telemetry.counters.upload_bytes += size.x * size.y * 4
 
     def update_from_render_window(self, render_window, x, y):
         if self._const:
             raise TypeError("this texture is const")
         cgraphics.sfTexture_updateFromRenderWindow(self, render_window, x, y)
+        _telemetry.counters.texture_uploads += 1
+        if _telemetry.enabled:
+            size = render_window.get_size()
+            _telemetry.counters.upload_bytes += size.x * size.y * 4
 
     def set_smooth(self, smooth):
         if self._const:
@@ -500,16 +1092,16 @@ class Transformable(ctypes.c_void_p):
         cgraphics.sfTransformable_destroy(self)
 
     def set_position(self, *pos):
-        cgraphics.sfTransformable_setPosition(self, csfml.system.Vector2f(*pos))
+        cgraphics.sfTransformable_setPosition(self, csfml.system._vector(csfml.system.Vector2f, pos))
 
     def set_rotation(self, angle):
         cgraphics.sfTransformable_setRotation(self, angle)
 
     def set_scale(self, *scale):
-        cgraphics.sfTransformable_setScale(self, csfml.system.Vector2f(*scale))
+        cgraphics.sfTransformable_setScale(self, csfml.system._vector(csfml.system.Vector2f, scale))
 
     def set_origin(self, *origin):
-        cgraphics.sfTransformable_setOrigin(self, csfml.system.Vector2f(*origin))
+        cgraphics.sfTransformable_setOrigin(self, csfml.system._vector(csfml.system.Vector2f, origin))
 
     def get_position(self):
         return cgraphics.sfTransformable_getPosition(self)
@@ -524,13 +1116,13 @@ class Transformable(ctypes.c_void_p):
         return cgraphics.sfTransformable_getOrigin(self)
 
     def move(self, *offset):
-        return cgraphics.sfTransformable_move(self, csfml.system.Vector2f(*offset))
+        return cgraphics.sfTransformable_move(self, csfml.system._vector(csfml.system.Vector2f, offset))
 
     def rotate(self, angle):
         return cgraphics.sfTransformable_rotate(self, angle)
 
     def scale(self, *factors):
-        return cgraphics.sfTransformable_scale(self, csfml.system.Vector2f(*factors))
+        return cgraphics.sfTransformable_scale(self, csfml.system._vector(csfml.system.Vector2f, factors))
 
     def get_transform(self):
         return cgraphics.sfTransformable_getTransform(self)
@@ -546,7 +1138,130 @@ class Transformable(ctypes.c_void_p):
 
     origin = property(get_origin, set_origin)
 
-class View(ctypes.c_void_p):
+class Vertex(ctypes.Structure):
+    _fields_ = [('position', csfml.system.Vector2f),
+                ('color', Color),
+                ('tex_coords', csfml.system.Vector2f)]
+
+    def __init__(self, position=(0, 0), color=(255, 255, 255, 255), tex_coords=(0, 0)):
+        ctypes.Structure.__init__(self, position, color, tex_coords)
+
+    def __repr__(self):
+        return 'csfml.graphics.Vertex(%r, %r, %r)' % (tuple(self.position), self.color, tuple(self.tex_coords))
+
+if numpy is not None:
+    # Same layout as sfVertex, so NumPy vertex data can be passed to
+    # draw_primitives without conversion.
+    vertex_dtype = numpy.dtype([('position', numpy.float32, (2,)),
+                                ('color', numpy.uint8, (4,)),
+                                ('tex_coords', numpy.float32, (2,))])
+else:
+    vertex_dtype = None
+
+class VertexArray(object):
+    # Vertices live in a NumPy array of vertex_dtype, which is handed to
+    # draw_primitives as-is. `vertices` (and the position/color/tex_coords
+    # views of it) can be modified in place between draws. Storage grows by
+    # doubling, so any view taken before an append or resize may be stale.
+
+    def __init__(self, primitive_type=PrimitiveType.Points, count=0):
+        if numpy is None:
+            raise TypeError("VertexArray requires numpy")
+        self.primitive_type = primitive_type
+        self.count = 0
+        self._allocate(max(count, 4))
+        self.resize(count)
+
+    def _allocate(self, capacity):
+        storage = numpy.zeros(capacity, vertex_dtype)
+        if self.count:
+            storage[:self.count] = self._storage[:self.count]
+        self._storage = storage
+        self._pointer = storage.ctypes.data_as(ctypes.POINTER(Vertex))
+
+    def _reserve(self, count):
+        if count > len(self._storage):
+            capacity = len(self._storage)
+            while capacity < count:
+                capacity *= 2
+            self._allocate(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("vertex index out of range")
+        return index
+
+    def __getitem__(self, index):
+        # Returns a Vertex sharing memory with the array.
+        return Vertex.from_buffer(self._storage, self._index(index) * ctypes.sizeof(Vertex))
+
+    def __setitem__(self, index, vertex):
+        self._storage[self._index(index)] = numpy.frombuffer(vertex, vertex_dtype)[0]
+
+    @property
+    def vertices(self):
+        return self._storage[:self.count]
+
+    @property
+    def position(self):
+        return self._storage['position'][:self.count]
+
+    @property
+    def color(self):
+        return self._storage['color'][:self.count]
+
+    @property
+    def tex_coords(self):
+        return self._storage['tex_coords'][:self.count]
+
+    def get_pointer(self):
+        return self._pointer
+
+    def clear(self):
+        self.count = 0
+
+    def resize(self, count):
+        self._reserve(count)
+        if count > self.count:
+            self._storage[self.count:count] = numpy.zeros(1, vertex_dtype)
+            self._storage['color'][self.count:count] = 255
+        self.count = count
+
+    def append(self, position, color=(255, 255, 255, 255), tex_coords=(0, 0)):
+        self._reserve(self.count + 1)
+        if isinstance(position, Vertex):
+            self._storage[self.count] = numpy.frombuffer(position, vertex_dtype)[0]
+        else:
+            self._storage[self.count] = (tuple(position), tuple(color), tuple(tex_coords))
+        self.count += 1
+
+    def extend(self, vertices):
+        vertices = numpy.asarray(vertices, vertex_dtype)
+        start = self.count
+        self._reserve(start + len(vertices))
+        self._storage[start:start + len(vertices)] = vertices
+        self.count += len(vertices)
+
+    def get_bounds(self):
+        if not self.count:
+            return FloatRect(0, 0, 0, 0)
+        position = self.position
+        low = position.min(axis=0)
+        high = position.max(axis=0)
+        return FloatRect(low[0], low[1], high[0] - low[0], high[1] - low[1])
+
+    bounds = property(get_bounds)
+
+    def draw(self, target, states=None):
+        if self.count:
+            target.draw_primitives(self._pointer, self.count, self.primitive_type, states)
+
+class View(_Resource):
     def __new__(self, *args):
         return cgraphics.sfView_create()
 
@@ -557,16 +1272,11 @@ class View(ctypes.c_void_p):
     def copy(self):
         return cgraphics.sfView_copy(self)
 
-    def __del__(self):
-        if self.value != 0:
-            cgraphics.sfView_destroy(self)
-            self.value = 0
-
     def set_center(self, *center):
-        cgraphics.sfView_setCenter(self, csfml.system.Vector2f(*center))
+        cgraphics.sfView_setCenter(self, csfml.system._vector(csfml.system.Vector2f, center))
 
     def set_size(self, *size):
-        cgraphics.sfView_setSize(self, csfml.system.Vector2f(*size))
+        cgraphics.sfView_setSize(self, csfml.system._vector(csfml.system.Vector2f, size))
 
     def set_rotation(self, angle):
         cgraphics.sfView_setRotation(self, angle)
@@ -590,7 +1300,7 @@ class View(ctypes.c_void_p):
         return cgraphics.sfView_getViewport(self)
 
     def move(self, *offset):
-        cgraphics.sfView_move(self, csfml.system.Vector2f(*offset))
+        cgraphics.sfView_move(self, csfml.system._vector(csfml.system.Vector2f, offset))
 
     def rotate(self, angle):
         cgraphics.sfView_rotate(self, angle)
@@ -624,6 +1334,50 @@ class RenderStates(ctypes.Structure):
     def __init__(self, blend_mode=BlendMode.BlendAlpha, transform=Transform.identity, texture=None, shader=None):
         ctypes.Structure.__init__(self, blend_mode, transform, texture, shader)
 
+Font._destroy_func = cgraphics.sfFont_destroy
+Image._destroy_func = cgraphics.sfImage_destroy
+Shader._destroy_func = cgraphics.sfShader_destroy
+RenderTexture._destroy_func = cgraphics.sfRenderTexture_destroy
+Sprite._destroy_func = cgraphics.sfSprite_destroy
+Texture._destroy_func = cgraphics.sfTexture_destroy
+View._destroy_func = cgraphics.sfView_destroy
+
+def _record_image(result, func, args):
+    if result.value:
+        size = cgraphics.sfImage_getSize(result)
+        csfml.memory.registry.record(result.value, 'Image', size.x * size.y * 4)
+    return result
+
+def _record_texture(result, func, args):
+    if result.value:
+        size = cgraphics.sfTexture_getSize(result)
+        csfml.memory.registry.record(result.value, 'Texture', size.x * size.y * 4)
+    return result
+
+def _record_render_texture(result, func, args):
+    if result.value:
+        csfml.memory.registry.record(result.value, 'RenderTexture', args[0] * args[1] * 4)
+    return result
+
+def _record_font(result, func, args):
+    # Glyph pages are allocated lazily, so all we can know up front is the
+    # size of the font data itself.
+    if result.value:
+        if func is cgraphics.sfFont_createFromFile:
+            try:
+                size = os.path.getsize(args[0])
+            except OSError:
+                size = 0
+        elif func is cgraphics.sfFont_createFromMemory:
+            size = args[1]
+        elif func is cgraphics.sfFont_createFromStream:
+            stream = args[0]
+            size = max(0, stream._get_size(stream._userdata))
+        else:
+            size = csfml.memory.registry.get_size(args[0].value)
+        csfml.memory.registry.record(result.value, 'Font', size)
+    return result
+
 cgraphics.sfColor_add.argtypes = [Color, Color]
 cgraphics.sfColor_add.restype = Color
 
@@ -638,15 +1392,19 @@ cgraphics.sfFloatRect_intersects.restype = csfml.system.Bool
 
 cgraphics.sfFont_createFromFile.argtypes = [ctypes.c_char_p]
 cgraphics.sfFont_createFromFile.restype = Font
+cgraphics.sfFont_createFromFile.errcheck = _record_font
 
 cgraphics.sfFont_createFromMemory.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
 cgraphics.sfFont_createFromMemory.restype = Font
+cgraphics.sfFont_createFromMemory.errcheck = _record_font
 
 cgraphics.sfFont_createFromStream.argtypes = [csfml.system._InputStream]
 cgraphics.sfFont_createFromStream.restype = Font
+cgraphics.sfFont_createFromStream.errcheck = _record_font
 
 cgraphics.sfFont_copy.argtypes = [Font]
 cgraphics.sfFont_copy.restype = Font
+cgraphics.sfFont_copy.errcheck = _record_font
 
 cgraphics.sfFont_destroy.argtypes = [Font]
 cgraphics.sfFont_destroy.restype = None
@@ -665,24 +1423,31 @@ cgraphics.sfFont_getTexture.restype = Texture
 
 cgraphics.sfImage_create.argtypes = [ctypes.c_uint, ctypes.c_uint]
 cgraphics.sfImage_create.restype = Image
+cgraphics.sfImage_create.errcheck = _record_image
 
 cgraphics.sfImage_createFromColor.argtypes = [ctypes.c_uint, ctypes.c_uint, Color]
 cgraphics.sfImage_createFromColor.restype = Image
+cgraphics.sfImage_createFromColor.errcheck = _record_image
 
 cgraphics.sfImage_createFromPixels.argtypes = [ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p]
 cgraphics.sfImage_createFromPixels.restype = Image
+cgraphics.sfImage_createFromPixels.errcheck = _record_image
 
 cgraphics.sfImage_createFromFile.argtypes = [ctypes.c_char_p]
 cgraphics.sfImage_createFromFile.restype = Image
+cgraphics.sfImage_createFromFile.errcheck = _record_image
 
 cgraphics.sfImage_createFromMemory.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
 cgraphics.sfImage_createFromMemory.restype = Image
+cgraphics.sfImage_createFromMemory.errcheck = _record_image
 
 cgraphics.sfImage_createFromStream.argtypes = [csfml.system._InputStream]
 cgraphics.sfImage_createFromStream.restype = Image
+cgraphics.sfImage_createFromStream.errcheck = _record_image
 
 cgraphics.sfImage_copy.argtypes = [Image]
 cgraphics.sfImage_copy.restype = Image
+cgraphics.sfImage_copy.errcheck = _record_image
 
 cgraphics.sfImage_destroy.argtypes = [Image]
 cgraphics.sfImage_destroy.restype = None
@@ -690,6 +1455,22 @@ cgraphics.sfImage_destroy.restype = None
 cgraphics.sfImage_saveToFile.argtypes = [Image, ctypes.c_char_p]
 cgraphics.sfImage_saveToFile.restype = csfml.system.Bool
 
+if hasattr(cgraphics, 'sfImage_saveToMemory'):
+    cgraphics.sfBuffer_create.argtypes = []
+    cgraphics.sfBuffer_create.restype = ctypes.c_void_p
+
+    cgraphics.sfBuffer_destroy.argtypes = [ctypes.c_void_p]
+    cgraphics.sfBuffer_destroy.restype = None
+
+    cgraphics.sfBuffer_getSize.argtypes = [ctypes.c_void_p]
+    cgraphics.sfBuffer_getSize.restype = ctypes.c_size_t
+
+    cgraphics.sfBuffer_getData.argtypes = [ctypes.c_void_p]
+    cgraphics.sfBuffer_getData.restype = ctypes.c_void_p
+
+    cgraphics.sfImage_saveToMemory.argtypes = [Image, ctypes.c_void_p, ctypes.c_char_p]
+    cgraphics.sfImage_saveToMemory.restype = csfml.system.Bool
+
 cgraphics.sfImage_getSize.argtypes = [Image]
 cgraphics.sfImage_getSize.restype = csfml.system.Vector2u
 
@@ -720,6 +1501,176 @@ cgraphics.sfIntRect_contains.restype = csfml.system.Bool
 cgraphics.sfIntRect_intersects.argtypes = [ctypes.POINTER(IntRect), ctypes.POINTER(IntRect), ctypes.POINTER(IntRect)]
 cgraphics.sfIntRect_intersects.restype = csfml.system.Bool
 
+cgraphics.sfRenderWindow_createUnicode.argtypes = [csfml.window.VideoMode, ctypes.c_char_p, ctypes.c_uint32, ctypes.POINTER(csfml.window.ContextSettings)]
+cgraphics.sfRenderWindow_createUnicode.restype = RenderWindow
+
+cgraphics.sfRenderWindow_createFromHandle.argtypes = [csfml.window.WindowHandle, ctypes.POINTER(csfml.window.ContextSettings)]
+cgraphics.sfRenderWindow_createFromHandle.restype = RenderWindow
+
+cgraphics.sfRenderWindow_destroy.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_destroy.restype = None
+
+cgraphics.sfRenderWindow_close.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_close.restype = None
+
+cgraphics.sfRenderWindow_isOpen.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_isOpen.restype = csfml.system.Bool
+
+cgraphics.sfRenderWindow_getSettings.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getSettings.restype = csfml.window.ContextSettings
+
+cgraphics.sfRenderWindow_pollEvent.argtypes = [RenderWindow, ctypes.POINTER(csfml.window.Event)]
+cgraphics.sfRenderWindow_pollEvent.restype = csfml.system.Bool
+
+cgraphics.sfRenderWindow_waitEvent.argtypes = [RenderWindow, ctypes.POINTER(csfml.window.Event)]
+cgraphics.sfRenderWindow_waitEvent.restype = csfml.system.Bool
+
+cgraphics.sfRenderWindow_getPosition.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getPosition.restype = csfml.system.Vector2i
+
+cgraphics.sfRenderWindow_setPosition.argtypes = [RenderWindow, csfml.system.Vector2i]
+cgraphics.sfRenderWindow_setPosition.restype = None
+
+cgraphics.sfRenderWindow_getSize.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getSize.restype = csfml.system.Vector2u
+
+cgraphics.sfRenderWindow_setSize.argtypes = [RenderWindow, csfml.system.Vector2u]
+cgraphics.sfRenderWindow_setSize.restype = None
+
+cgraphics.sfRenderWindow_setUnicodeTitle.argtypes = [RenderWindow, ctypes.c_char_p]
+cgraphics.sfRenderWindow_setUnicodeTitle.restype = None
+
+cgraphics.sfRenderWindow_setIcon.argtypes = [RenderWindow, ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(ctypes.c_uint8)]
+cgraphics.sfRenderWindow_setIcon.restype = None
+
+cgraphics.sfRenderWindow_setVisible.argtypes = [RenderWindow, csfml.system.Bool]
+cgraphics.sfRenderWindow_setVisible.restype = None
+
+cgraphics.sfRenderWindow_setMouseCursorVisible.argtypes = [RenderWindow, csfml.system.Bool]
+cgraphics.sfRenderWindow_setMouseCursorVisible.restype = None
+
+cgraphics.sfRenderWindow_setVerticalSyncEnabled.argtypes = [RenderWindow, csfml.system.Bool]
+cgraphics.sfRenderWindow_setVerticalSyncEnabled.restype = None
+
+cgraphics.sfRenderWindow_setKeyRepeatEnabled.argtypes = [RenderWindow, csfml.system.Bool]
+cgraphics.sfRenderWindow_setKeyRepeatEnabled.restype = None
+
+cgraphics.sfRenderWindow_setActive.argtypes = [RenderWindow, csfml.system.Bool]
+cgraphics.sfRenderWindow_setActive.restype = csfml.system.Bool
+
+cgraphics.sfRenderWindow_display.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_display.restype = None
+
+cgraphics.sfRenderWindow_setFramerateLimit.argtypes = [RenderWindow, ctypes.c_uint]
+cgraphics.sfRenderWindow_setFramerateLimit.restype = None
+
+cgraphics.sfRenderWindow_setJoystickThreshold.argtypes = [RenderWindow, ctypes.c_float]
+cgraphics.sfRenderWindow_setJoystickThreshold.restype = None
+
+cgraphics.sfRenderWindow_getSystemHandle.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getSystemHandle.restype = csfml.window.WindowHandle
+
+cgraphics.sfRenderWindow_clear.argtypes = [RenderWindow, Color]
+cgraphics.sfRenderWindow_clear.restype = None
+
+cgraphics.sfRenderWindow_setView.argtypes = [RenderWindow, View]
+cgraphics.sfRenderWindow_setView.restype = None
+
+cgraphics.sfRenderWindow_getView.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getView.restype = View
+
+cgraphics.sfRenderWindow_getDefaultView.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_getDefaultView.restype = View
+
+cgraphics.sfRenderWindow_drawSprite.argtypes = [RenderWindow, Sprite, ctypes.POINTER(RenderStates)]
+cgraphics.sfRenderWindow_drawSprite.restype = None
+
+cgraphics.sfRenderWindow_drawPrimitives.argtypes = [RenderWindow, ctypes.POINTER(Vertex), ctypes.c_uint, PrimitiveType, ctypes.POINTER(RenderStates)]
+cgraphics.sfRenderWindow_drawPrimitives.restype = None
+
+cgraphics.sfRenderWindow_getViewport.argtypes = [RenderWindow, View]
+cgraphics.sfRenderWindow_getViewport.restype = IntRect
+
+cgraphics.sfRenderWindow_mapPixelToCoords.argtypes = [RenderWindow, csfml.system.Vector2i, View]
+cgraphics.sfRenderWindow_mapPixelToCoords.restype = csfml.system.Vector2f
+
+cgraphics.sfRenderWindow_mapCoordsToPixel.argtypes = [RenderWindow, csfml.system.Vector2f, View]
+cgraphics.sfRenderWindow_mapCoordsToPixel.restype = csfml.system.Vector2i
+
+cgraphics.sfRenderWindow_pushGLStates.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_pushGLStates.restype = None
+
+cgraphics.sfRenderWindow_popGLStates.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_popGLStates.restype = None
+
+cgraphics.sfRenderWindow_resetGLStates.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_resetGLStates.restype = None
+
+cgraphics.sfRenderWindow_capture.argtypes = [RenderWindow]
+cgraphics.sfRenderWindow_capture.restype = Image
+cgraphics.sfRenderWindow_capture.errcheck = _record_image
+
+cgraphics.sfRenderTexture_create.argtypes = [ctypes.c_uint, ctypes.c_uint, csfml.system.Bool]
+cgraphics.sfRenderTexture_create.restype = RenderTexture
+cgraphics.sfRenderTexture_create.errcheck = _record_render_texture
+
+cgraphics.sfRenderTexture_destroy.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_destroy.restype = None
+
+cgraphics.sfRenderTexture_getSize.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_getSize.restype = csfml.system.Vector2u
+
+cgraphics.sfRenderTexture_setActive.argtypes = [RenderTexture, csfml.system.Bool]
+cgraphics.sfRenderTexture_setActive.restype = csfml.system.Bool
+
+cgraphics.sfRenderTexture_display.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_display.restype = None
+
+cgraphics.sfRenderTexture_clear.argtypes = [RenderTexture, Color]
+cgraphics.sfRenderTexture_clear.restype = None
+
+cgraphics.sfRenderTexture_setView.argtypes = [RenderTexture, View]
+cgraphics.sfRenderTexture_setView.restype = None
+
+cgraphics.sfRenderTexture_getView.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_getView.restype = View
+
+cgraphics.sfRenderTexture_getDefaultView.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_getDefaultView.restype = View
+
+cgraphics.sfRenderTexture_getViewport.argtypes = [RenderTexture, View]
+cgraphics.sfRenderTexture_getViewport.restype = IntRect
+
+cgraphics.sfRenderTexture_mapPixelToCoords.argtypes = [RenderTexture, csfml.system.Vector2i, View]
+cgraphics.sfRenderTexture_mapPixelToCoords.restype = csfml.system.Vector2f
+
+cgraphics.sfRenderTexture_mapCoordsToPixel.argtypes = [RenderTexture, csfml.system.Vector2f, View]
+cgraphics.sfRenderTexture_mapCoordsToPixel.restype = csfml.system.Vector2i
+
+cgraphics.sfRenderTexture_drawSprite.argtypes = [RenderTexture, Sprite, ctypes.POINTER(RenderStates)]
+cgraphics.sfRenderTexture_drawSprite.restype = None
+
+cgraphics.sfRenderTexture_drawPrimitives.argtypes = [RenderTexture, ctypes.POINTER(Vertex), ctypes.c_uint, PrimitiveType, ctypes.POINTER(RenderStates)]
+cgraphics.sfRenderTexture_drawPrimitives.restype = None
+
+cgraphics.sfRenderTexture_pushGLStates.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_pushGLStates.restype = None
+
+cgraphics.sfRenderTexture_popGLStates.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_popGLStates.restype = None
+
+cgraphics.sfRenderTexture_resetGLStates.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_resetGLStates.restype = None
+
+cgraphics.sfRenderTexture_getTexture.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_getTexture.restype = Texture
+
+cgraphics.sfRenderTexture_setSmooth.argtypes = [RenderTexture, csfml.system.Bool]
+cgraphics.sfRenderTexture_setSmooth.restype = None
+
+cgraphics.sfRenderTexture_isSmooth.argtypes = [RenderTexture]
+cgraphics.sfRenderTexture_isSmooth.restype = csfml.system.Bool
+
 cgraphics.sfShader_createFromFile.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
 cgraphics.sfShader_createFromFile.restype = Shader
 
@@ -842,21 +1793,27 @@ cgraphics.sfSprite_getGlobalBounds.restype = FloatRect
 
 cgraphics.sfTexture_create.argtypes = [ctypes.c_uint, ctypes.c_uint]
 cgraphics.sfTexture_create.restype = Texture
+cgraphics.sfTexture_create.errcheck = _record_texture
 
 cgraphics.sfTexture_createFromFile.argtypes = [ctypes.c_char_p, ctypes.POINTER(IntRect)]
 cgraphics.sfTexture_createFromFile.restype = Texture
+cgraphics.sfTexture_createFromFile.errcheck = _record_texture
 
 cgraphics.sfTexture_createFromMemory.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(IntRect)]
 cgraphics.sfTexture_createFromMemory.restype = Texture
+cgraphics.sfTexture_createFromMemory.errcheck = _record_texture
 
 cgraphics.sfTexture_createFromStream.argtypes = [csfml.system._InputStream, ctypes.POINTER(IntRect)]
 cgraphics.sfTexture_createFromStream.restype = Texture
+cgraphics.sfTexture_createFromStream.errcheck = _record_texture
 
 cgraphics.sfTexture_createFromImage.argtypes = [Image, ctypes.POINTER(IntRect)]
 cgraphics.sfTexture_createFromImage.restype = Texture
+cgraphics.sfTexture_createFromImage.errcheck = _record_texture
 
 cgraphics.sfTexture_copy.argtypes = [Texture]
 cgraphics.sfTexture_copy.restype = Texture
+cgraphics.sfTexture_copy.errcheck = _record_texture
 
 cgraphics.sfTexture_destroy.argtypes = [Texture]
 cgraphics.sfTexture_destroy.restype = None
@@ -866,6 +1823,7 @@ cgraphics.sfTexture_getSize.restype = csfml.system.Vector2u
 
 cgraphics.sfTexture_copyToImage.argtypes = [Texture]
 cgraphics.sfTexture_copyToImage.restype = Image
+cgraphics.sfTexture_copyToImage.errcheck = _record_image
 
 cgraphics.sfTexture_updateFromPixels.argtypes = [Texture, ctypes.POINTER(ctypes.c_uint8), ctypes.c_uint, ctypes.c_uint, ctypes.c_uint, ctypes.c_uint]
 cgraphics.sfTexture_updateFromPixels.restype = None
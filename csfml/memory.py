@@ -0,0 +1,151 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import os
+import sys
+import threading
+
+_package_dir = os.path.dirname(os.path.abspath(__file__))
+
+def _allocation_site():
+    f = sys._getframe(2)
+    while f is not None and os.path.dirname(os.path.abspath(f.f_code.co_filename)) == _package_dir:
+        f = f.f_back
+    if f is None:
+        return None
+    return '%s:%d' % (f.f_code.co_filename, f.f_lineno)
+
+class MemoryRegistry(object):
+    # Estimated native memory held by live CSFML objects, by type name.
+    #
+    # Listeners are called as listener(registry, type_name, level, total, limit)
+    # where type_name is None for the overall budget and level is 'soft' or
+    # 'hard'. Soft limits fire once each time the total crosses them; hard
+    # limits fire on every allocation made while over the limit, so caches
+    # get a chance to shed load before things get worse.
+
+    def __init__(self):
+        self.track_sites = False
+        self._lock = threading.Lock()
+        self._live = {}
+        self._totals = collections.Counter()
+        self._counts = collections.Counter()
+        self._high_water = collections.Counter()
+        self._total = 0
+        self._total_high_water = 0
+        self._budgets = {}
+        self._over_soft = set()
+        self._listeners = []
+
+    def record(self, handle, type_name, size):
+        site = _allocation_site() if self.track_sites else None
+        with self._lock:
+            old = self._live.pop(handle, None)
+            if old is not None:
+                self._remove(*old)
+            self._live[handle] = (type_name, size, site)
+            self._totals[type_name] += size
+            self._counts[type_name] += 1
+            self._total += size
+            if self._totals[type_name] > self._high_water[type_name]:
+                self._high_water[type_name] = self._totals[type_name]
+            if self._total > self._total_high_water:
+                self._total_high_water = self._total
+            fired = self._check(type_name) + self._check(None)
+        for args in fired:
+            for listener in list(self._listeners):
+                listener(self, *args)
+
+    def forget(self, handle):
+        with self._lock:
+            entry = self._live.pop(handle, None)
+            if entry is not None:
+                self._remove(*entry)
+
+    def _remove(self, type_name, size, site):
+        self._totals[type_name] -= size
+        self._counts[type_name] -= 1
+        self._total -= size
+        for key in (type_name, None):
+            budget = self._budgets.get(key)
+            if budget is not None and budget[0] is not None and self.get_total(key) < budget[0]:
+                self._over_soft.discard(key)
+
+    def _check(self, type_name):
+        budget = self._budgets.get(type_name)
+        if budget is None:
+            return []
+        soft, hard = budget
+        total = self.get_total(type_name)
+        if hard is not None and total > hard:
+            return [(type_name, 'hard', total, hard)]
+        if soft is not None and total > soft and type_name not in self._over_soft:
+            self._over_soft.add(type_name)
+            return [(type_name, 'soft', total, soft)]
+        return []
+
+    def set_budget(self, type_name=None, soft=None, hard=None):
+        with self._lock:
+            if soft is None and hard is None:
+                self._budgets.pop(type_name, None)
+            else:
+                self._budgets[type_name] = (soft, hard)
+            self._over_soft.discard(type_name)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def get_size(self, handle):
+        entry = self._live.get(handle)
+        if entry is None:
+            return 0
+        return entry[1]
+
+    def get_total(self, type_name=None):
+        if type_name is None:
+            return self._total
+        return self._totals[type_name]
+
+    def get_count(self, type_name=None):
+        if type_name is None:
+            return len(self._live)
+        return self._counts[type_name]
+
+    def get_high_water(self, type_name=None):
+        if type_name is None:
+            return self._total_high_water
+        return self._high_water[type_name]
+
+    def reset_high_water(self):
+        with self._lock:
+            self._high_water = collections.Counter(self._totals)
+            self._total_high_water = self._total
+
+    def get_totals(self):
+        return dict((k, v) for (k, v) in self._totals.items() if self._counts[k])
+
+    def get_sites(self, type_name=None):
+        result = collections.Counter()
+        with self._lock:
+            for (name, size, site) in self._live.values():
+                if type_name is None or name == type_name:
+                    result[site] += size
+        return dict(result)
+
+registry = MemoryRegistry()
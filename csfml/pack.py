@@ -0,0 +1,229 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Pack file layout (all integers little-endian):
+#
+#   header: magic 'CSFMLPAK', u32 version, u32 entry count
+#   index:  per entry: u16 name length, name (UTF-8), u8 type length, type
+#           (ASCII), u64 offset, u64 size, 32-byte SHA-256 of the data
+#   data:   each entry's bytes at its offset, 16-byte aligned and followed by
+#           a NUL so text (shader source) can be used as a C string in place
+
+import ctypes
+import hashlib
+import mmap
+import os
+import struct
+import weakref
+
+import csfml
+import csfml.graphics
+
+_magic = b'CSFMLPAK'
+_version = 1
+_header = struct.Struct('<8sII')
+_entry_tail = struct.Struct('<QQ32s')
+_alignment = 16
+
+_types_by_extension = {
+    '.png': 'texture', '.jpg': 'texture', '.jpeg': 'texture', '.bmp': 'texture',
+    '.tga': 'texture', '.gif': 'texture', '.psd': 'texture', '.hdr': 'texture', '.pic': 'texture',
+    '.ttf': 'font', '.otf': 'font', '.pfb': 'font', '.pcf': 'font', '.fnt': 'font',
+    '.vert': 'shader', '.frag': 'shader', '.glsl': 'shader',
+}
+
+class PackBuilder(object):
+    def __init__(self):
+        self._entries = []
+        self._names = set()
+
+    def add_data(self, name, data, type='raw'):
+        if name in self._names:
+            raise ValueError("duplicate pack entry %r" % name)
+        self._names.add(name)
+        self._entries.append((name, type, bytes(data)))
+
+    def add_file(self, name, path, type=None):
+        if type is None:
+            type = _types_by_extension.get(os.path.splitext(path)[1].lower(), 'raw')
+        with open(path, 'rb') as f:
+            self.add_data(name, f.read(), type)
+
+    def write(self, filename):
+        index_size = sum(2 + len(name.encode('utf-8')) + 1 + len(type) + _entry_tail.size
+                         for (name, type, data) in self._entries)
+        offset = _header.size + index_size
+        layout = []
+        for name, type, data in self._entries:
+            offset += -offset % _alignment
+            layout.append(offset)
+            offset += len(data) + 1
+        with open(filename, 'wb') as f:
+            f.write(_header.pack(_magic, _version, len(self._entries)))
+            for (name, type, data), offset in zip(self._entries, layout):
+                encoded = name.encode('utf-8')
+                f.write(struct.pack('<H', len(encoded)))
+                f.write(encoded)
+                f.write(struct.pack('<B', len(type)))
+                f.write(type.encode('ascii'))
+                f.write(_entry_tail.pack(offset, len(data), hashlib.sha256(data).digest()))
+            for (name, type, data), offset in zip(self._entries, layout):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(data)
+                f.write(b'\0')
+
+class PackEntry(object):
+    def __init__(self, name, type, offset, size, digest):
+        self.name = name
+        self.type = type
+        self.offset = offset
+        self.size = size
+        self.digest = digest
+
+    def __repr__(self):
+        return 'csfml.pack.PackEntry(%r, %r, %d, %d)' % (self.name, self.type, self.offset, self.size)
+
+class _Pin(object):
+    # Keeps a pack mapped for as long as it is referenced.
+    pass
+
+class Pack(object):
+    # Maps a pack file once and hands out pointers into the mapping, so
+    # from_memory loads read straight from the page cache. Objects that keep
+    # using their memory after loading (fonts) hold a pin on the pack; close()
+    # only unmaps once every pin is gone.
+
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        try:
+            # A private mapping is writable as far as Python is concerned,
+            # which ctypes needs to take its address. We never write to it.
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self._anchor = ctypes.c_char.from_buffer(self._map)
+        self._base = ctypes.addressof(self._anchor)
+        self._pins = 0
+        self._closing = False
+        self.entries = {}
+        self._read_index(filename)
+
+    def _read_index(self, filename):
+        data = self._map
+        magic, version, count = _header.unpack_from(data, 0)
+        if magic != _magic:
+            raise ValueError("%r is not a pack file" % filename)
+        if version != _version:
+            raise ValueError("%r has unsupported pack version %d" % (filename, version))
+        pos = _header.size
+        for i in range(count):
+            (length,) = struct.unpack_from('<H', data, pos)
+            name = bytes(data[pos + 2:pos + 2 + length]).decode('utf-8')
+            pos += 2 + length
+            length = data[pos]
+            type = bytes(data[pos + 1:pos + 1 + length]).decode('ascii')
+            pos += 1 + length
+            offset, size, digest = _entry_tail.unpack_from(data, pos)
+            pos += _entry_tail.size
+            if offset + size > len(data):
+                raise ValueError("%r is truncated" % filename)
+            self.entries[name] = PackEntry(name, type, offset, size, digest)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def _entry(self, name):
+        if self._map is None or self._closing:
+            raise ValueError("pack is closed")
+        return self.entries[name]
+
+    def get_pointer(self, name):
+        entry = self._entry(name)
+        return ctypes.c_void_p(self._base + entry.offset), entry.size
+
+    def get_memoryview(self, name):
+        entry = self._entry(name)
+        return memoryview(self._map)[entry.offset:entry.offset + entry.size]
+
+    def read(self, name):
+        return bytes(self.get_memoryview(name))
+
+    def verify(self, name=None):
+        names = self.entries if name is None else [name]
+        for n in names:
+            view = self.get_memoryview(n)
+            try:
+                if hashlib.sha256(view).digest() != self.entries[n].digest:
+                    return False
+            finally:
+                view.release()
+        return True
+
+    def load_texture(self, name, area=None):
+        pointer, size = self.get_pointer(name)
+        return csfml.graphics.Texture.from_memory(pointer, size, area)
+
+    def load_image(self, name):
+        pointer, size = self.get_pointer(name)
+        return csfml.graphics.Image.from_memory(pointer, size)
+
+    def load_font(self, name):
+        pointer, size = self.get_pointer(name)
+        result = csfml.graphics.Font.from_memory(pointer, size)
+        if result.value:
+            # sfFont reads glyphs from this memory for as long as it, or any
+            # copy of it, lives. Font.copy() hands _data on to the copy.
+            pin = _Pin()
+            self._pins += 1
+            weakref.finalize(pin, self._unpin)
+            result._data = pin
+        return result
+
+    def load_shader(self, vertex_name=None, fragment_name=None):
+        sources = []
+        for name in (vertex_name, fragment_name):
+            if name is None:
+                sources.append(None)
+            else:
+                pointer, size = self.get_pointer(name)
+                sources.append(ctypes.cast(pointer, ctypes.c_char_p))
+        return csfml.graphics.Shader.from_memory(*sources)
+
+    def _unpin(self):
+        self._pins -= 1
+        if self._closing and self._pins == 0:
+            self._unmap()
+
+    def _unmap(self):
+        if self._map is not None:
+            del self._anchor
+            self._map.close()
+            self._map = None
+            self._file.close()
+
+    def close(self):
+        self._closing = True
+        if self._pins == 0:
+            self._unmap()
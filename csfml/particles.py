@@ -0,0 +1,220 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import math
+
+import numpy
+
+import csfml
+import csfml.graphics
+
+_corners = ((-1.0, -1.0), (1.0, -1.0), (1.0, 1.0), (-1.0, 1.0))
+
+class ParticleSystem(object):
+    # Particle state lives in parallel NumPy arrays, with the live particles
+    # packed at the front (indices 0 to count-1). Dead particles are removed by
+    # compacting the arrays, so everything stays a contiguous slice.
+    #
+    # Rotation is in degrees, color is RGBA bytes, and size is the edge length
+    # of the particle's square.
+
+    def __init__(self, capacity, texture=None, blend_mode=csfml.graphics.BlendMode.BlendAlpha, texture_rect=None):
+        self.capacity = capacity
+        self.count = 0
+        self.position = numpy.zeros((capacity, 2), numpy.float32)
+        self.velocity = numpy.zeros((capacity, 2), numpy.float32)
+        self.life = numpy.zeros(capacity, numpy.float32)
+        self.lifetime = numpy.ones(capacity, numpy.float32)
+        self.color = numpy.zeros((capacity, 4), numpy.uint8)
+        self.size = numpy.zeros(capacity, numpy.float32)
+        self.rotation = numpy.zeros(capacity, numpy.float32)
+        self.angular_velocity = numpy.zeros(capacity, numpy.float32)
+        self.emitters = []
+        self.affectors = []
+        self.texture = texture
+        self._states = csfml.graphics.RenderStates(blend_mode, texture=texture)
+        self._vertices = numpy.zeros(capacity * 4, csfml.graphics.vertex_dtype)
+        self._pointer = self._vertices.ctypes.data_as(ctypes.POINTER(csfml.graphics.Vertex))
+        self.set_texture_rect(texture_rect)
+
+    def _arrays(self):
+        return (self.position, self.velocity, self.life, self.lifetime, self.color,
+                self.size, self.rotation, self.angular_velocity)
+
+    def set_texture_rect(self, rect=None):
+        if rect is None:
+            if self.texture is None:
+                left = top = width = height = 0
+            else:
+                size = self.texture.get_size()
+                left, top, width, height = 0, 0, size.x, size.y
+        else:
+            left, top, width, height = rect.left, rect.top, rect.width, rect.height
+        tex_coords = self._vertices['tex_coords']
+        for k, (dx, dy) in enumerate(_corners):
+            tex_coords[k::4, 0] = left + (dx + 1) * 0.5 * width
+            tex_coords[k::4, 1] = top + (dy + 1) * 0.5 * height
+
+    def spawn(self, count):
+        # Reserves up to `count` particles and returns the slice to fill in.
+        count = max(0, min(count, self.capacity - self.count))
+        result = slice(self.count, self.count + count)
+        self.life[result] = 0.0
+        self.lifetime[result] = 1.0
+        self.velocity[result] = 0.0
+        self.rotation[result] = 0.0
+        self.angular_velocity[result] = 0.0
+        self.color[result] = 255
+        self.count += count
+        return result
+
+    def clear(self):
+        self.count = 0
+
+    def update(self, dt):
+        for emitter in self.emitters:
+            emitter.emit(self, dt)
+
+        n = self.count
+        self.life[:n] -= dt
+        alive = self.life[:n] > 0
+        live = int(numpy.count_nonzero(alive))
+        if live != n:
+            for array in self._arrays():
+                array[:live] = array[:n][alive]
+            n = self.count = live
+
+        self.position[:n] += self.velocity[:n] * dt
+        self.rotation[:n] += self.angular_velocity[:n] * dt
+        for affector in self.affectors:
+            affector(self, dt)
+
+    def _build_vertices(self):
+        n = self.count
+        half = self.size[:n] * 0.5
+        radians = numpy.radians(self.rotation[:n])
+        cos = numpy.cos(radians) * half
+        sin = numpy.sin(radians) * half
+        x = self.position[:n, 0]
+        y = self.position[:n, 1]
+        position = self._vertices['position']
+        color = self._vertices['color']
+        end = 4 * n
+        for k, (dx, dy) in enumerate(_corners):
+            position[k:end:4, 0] = x + dx * cos - dy * sin
+            position[k:end:4, 1] = y + dx * sin + dy * cos
+            color[k:end:4] = self.color[:n]
+
+    def draw(self, target, states=None):
+        if not self.count:
+            return
+        self._build_vertices()
+        render_states = self._states
+        if states is not None:
+            render_states = csfml.graphics.RenderStates(render_states.blend_mode, states.transform, self.texture, states.shader)
+        target.draw_primitives(self._pointer, 4 * self.count, csfml.graphics.PrimitiveType.Quads, render_states)
+
+def _range(value):
+    if isinstance(value, (int, float)):
+        return (value, value)
+    return value
+
+class Emitter(object):
+    # Emits `rate` particles per second from `position`, optionally spread
+    # over a box of `area` (width, height). Each (low, high) pair is sampled
+    # uniformly; a single number means a fixed value. Angles are in degrees.
+
+    def __init__(self, rate, position=(0, 0), area=(0, 0), speed=(50, 100), angle=(0, 360),
+                 lifetime=(1, 2), size=(4, 8), color=(255, 255, 255, 255), rotation=(0, 360),
+                 angular_velocity=(0, 0), seed=None):
+        self.rate = rate
+        self.position = position
+        self.area = area
+        self.speed = _range(speed)
+        self.angle = _range(angle)
+        self.lifetime = _range(lifetime)
+        self.size = _range(size)
+        self.color = color
+        self.rotation = _range(rotation)
+        self.angular_velocity = _range(angular_velocity)
+        self.enabled = True
+        self._accumulator = 0.0
+        self._random = numpy.random.default_rng(seed)
+
+    def burst(self, system, count):
+        target = system.spawn(count)
+        count = target.stop - target.start
+        if not count:
+            return
+        uniform = self._random.uniform
+        x, y = self.position
+        width, height = self.area
+        system.position[target, 0] = x + uniform(-0.5, 0.5, count) * width
+        system.position[target, 1] = y + uniform(-0.5, 0.5, count) * height
+        angle = numpy.radians(uniform(self.angle[0], self.angle[1], count))
+        speed = uniform(self.speed[0], self.speed[1], count)
+        system.velocity[target, 0] = numpy.cos(angle) * speed
+        system.velocity[target, 1] = numpy.sin(angle) * speed
+        lifetime = uniform(self.lifetime[0], self.lifetime[1], count)
+        system.life[target] = lifetime
+        system.lifetime[target] = lifetime
+        system.size[target] = uniform(self.size[0], self.size[1], count)
+        system.color[target] = self.color
+        system.rotation[target] = uniform(self.rotation[0], self.rotation[1], count)
+        system.angular_velocity[target] = uniform(self.angular_velocity[0], self.angular_velocity[1], count)
+
+    def emit(self, system, dt):
+        if not self.enabled:
+            return
+        self._accumulator += self.rate * dt
+        count = int(self._accumulator)
+        if count:
+            self._accumulator -= count
+            self.burst(system, count)
+
+class Gravity(object):
+    def __init__(self, x, y):
+        self.acceleration = numpy.array((x, y), numpy.float32)
+
+    def __call__(self, system, dt):
+        system.velocity[:system.count] += self.acceleration * dt
+
+class Drag(object):
+    def __init__(self, coefficient):
+        self.coefficient = coefficient
+
+    def __call__(self, system, dt):
+        system.velocity[:system.count] *= math.exp(-self.coefficient * dt)
+
+class ColorOverLife(object):
+    def __init__(self, start, end):
+        self.start = numpy.array(start, numpy.float32)
+        self.delta = numpy.array(end, numpy.float32) - self.start
+
+    def __call__(self, system, dt):
+        n = system.count
+        t = 1.0 - system.life[:n] / system.lifetime[:n]
+        system.color[:n] = self.start + self.delta * t[:, numpy.newaxis]
+
+class SizeOverLife(object):
+    def __init__(self, start, end):
+        self.start = start
+        self.delta = end - start
+
+    def __call__(self, system, dt):
+        n = system.count
+        t = 1.0 - system.life[:n] / system.lifetime[:n]
+        system.size[:n] = self.start + self.delta * t
@@ -0,0 +1,205 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Cache file layout: 48-byte header (magic 'CSFMLPX2', u32 width, u32 height,
+# sha256 of the source file, little-endian) followed by width * height RGBA
+# pixels. Files are named after the same digest.
+
+import collections
+import ctypes
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+import csfml
+import csfml.graphics
+
+_magic = b'CSFMLPX2'
+_header = struct.Struct('<8sII32s')
+
+class PixelCache(object):
+    # Skips image decoding on later runs by keeping decoded pixels on disk.
+    # Entries are keyed by a hash of the source file's contents, so an edited
+    # file misses and identical files share one entry. Digests are remembered
+    # per path until the file's mtime or size changes. When the cache grows
+    # past max_size the least recently used files are deleted. The index of
+    # cache files is read from disk once and kept up to date from then on,
+    # so files added by other processes are only noticed when they are hit.
+
+    def __init__(self, directory, max_size=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+        self._entries = None
+        self._size = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _digest(self, filename, data=None):
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        known = self._digests.get(path)
+        if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            return known[2]
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        digest = hashlib.sha256(data).digest()
+        self._digests[path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def _cache_path(self, digest):
+        return os.path.join(self.directory, digest.hex() + '.px')
+
+    def _index(self):
+        if self._entries is None:
+            self._entries = collections.OrderedDict(
+                (path, size) for (mtime, size, path) in sorted(self._scan()))
+            self._size = sum(self._entries.values())
+        return self._entries
+
+    def _add(self, path, size):
+        entries = self._index()
+        self._size += size - entries.pop(path, 0)
+        entries[path] = size
+
+    def _remove(self, path):
+        self._size -= self._index().pop(path, 0)
+
+    def _open(self, filename):
+        try:
+            digest = self._digest(filename)
+            path = self._cache_path(digest)
+            f = open(path, 'rb')
+        except OSError:
+            return None
+        with f:
+            header = f.read(_header.size)
+            if len(header) < _header.size:
+                return None
+            magic, width, height, source = _header.unpack(header)
+            if magic != _magic or source != digest:
+                return None
+            size = os.fstat(f.fileno()).st_size
+            if size != _header.size + width * height * 4:
+                return None
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        # The index is ordered by use; the file's mtime carries that order over
+        # to the next process to scan the directory.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._add(path, size)
+        return width, height, data
+
+    def _with_pixels(self, entry, function):
+        width, height, data = entry
+        anchor = ctypes.c_char.from_buffer(data, _header.size)
+        try:
+            return function(width, height, ctypes.addressof(anchor))
+        finally:
+            del anchor
+            data.close()
+
+    def _store(self, digest, image):
+        size = image.get_size()
+        nbytes = size.x * size.y * 4
+        path = self._cache_path(digest)
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_header.pack(_magic, size.x, size.y, digest))
+                f.write(ctypes.string_at(image.get_pixels_ptr(), nbytes))
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self._add(path, _header.size + nbytes)
+        if self._size > self.max_size:
+            self.evict()
+
+    def load_image(self, filename):
+        entry = self._open(filename)
+        if entry is not None:
+            self.hits += 1
+            return self._with_pixels(entry, csfml.graphics.Image.from_pixels)
+        self.misses += 1
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except OSError:
+            # Let SFML report the failure and hand back an empty image.
+            return csfml.graphics.Image.from_file(os.fsencode(filename))
+        image = csfml.graphics.Image.from_memory(data, len(data))
+        if image.value:
+            self._store(self._digest(filename, data), image)
+        return image
+
+    def load_texture(self, filename, area=None):
+        entry = None if area is not None else self._open(filename)
+        if entry is not None:
+            self.hits += 1
+            def upload(width, height, address):
+                texture = csfml.graphics.Texture(width, height)
+                texture.update_from_pixels(ctypes.cast(address, ctypes.POINTER(ctypes.c_uint8)), width, height, 0, 0)
+                return texture
+            return self._with_pixels(entry, upload)
+        image = self.load_image(filename)
+        if not image.value:
+            raise IOError("failed to load image from %r" % filename)
+        return csfml.graphics.Texture.from_image(image, area)
+
+    def invalidate(self, filename):
+        try:
+            path = self._cache_path(self._digest(filename))
+            os.unlink(path)
+        except OSError:
+            return
+        self._remove(path)
+
+    def get_size(self):
+        self._index()
+        return self._size
+
+    def _scan(self):
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.px'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((st.st_mtime, st.st_size, path))
+        return result
+
+    def evict(self):
+        entries = self._index()
+        removed = 0
+        while self._size > self.max_size and entries:
+            path, size = entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            removed += 1
+        return removed
@@ -0,0 +1,196 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import multiprocessing
+import multiprocessing.shared_memory
+import os
+import queue
+import traceback
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _worker(render, initializer, initargs, width, height, slot_names, free_slots, jobs, results):
+    # Runs in a fresh (spawned) process, so it gets its own GL context.
+    import csfml.graphics
+
+    nbytes = width * height * 4
+    slots = [multiprocessing.shared_memory.SharedMemory(name) for name in slot_names]
+    anchors = [ctypes.c_char.from_buffer(slot.buf) for slot in slots]
+    try:
+        target = csfml.graphics.RenderTexture(width, height)
+        if not target.value:
+            raise RuntimeError("failed to create a %dx%d render texture" % (width, height))
+        target.set_active(True)
+        context = initializer(*initargs) if initializer is not None else None
+    except Exception:
+        results.put((None, None, None, traceback.format_exc()))
+        return
+
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job_id, scene, frames = job
+            for frame in frames:
+                try:
+                    target.clear()
+                    render(target, scene, frame, context)
+                    target.display()
+                    image = target.get_texture().copy_to_image()
+                except Exception:
+                    results.put((job_id, frame, None, traceback.format_exc()))
+                    continue
+                slot = free_slots.get()
+                ctypes.memmove(ctypes.addressof(anchors[slot]), image.get_pixels_ptr(), nbytes)
+                del image
+                results.put((job_id, frame, slot, None))
+    finally:
+        del anchors[:]
+        for slot in slots:
+            slot.close()
+
+class RenderedFrame(object):
+    # A finished frame, still sitting in its shared memory slot. Call
+    # release() (or use it as a context manager) once done with the pixels;
+    # workers stall when every slot is held.
+
+    def __init__(self, pool, frame, slot):
+        self.frame = frame
+        self.width = pool.width
+        self.height = pool.height
+        self._pool = pool
+        self._slot = slot
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    @property
+    def pixels(self):
+        if self._slot is None:
+            raise ValueError("frame has been released")
+        return self._pool._slots[self._slot].buf[:self.width * self.height * 4]
+
+    def as_array(self):
+        return numpy.frombuffer(self.pixels, numpy.uint8).reshape((self.height, self.width, 4))
+
+    def to_image(self):
+        import csfml.graphics
+        data = self.pixels
+        anchor = ctypes.c_char.from_buffer(data)
+        try:
+            return csfml.graphics.Image.from_pixels(self.width, self.height, ctypes.addressof(anchor))
+        finally:
+            del anchor
+            data.release()
+
+    def release(self):
+        if self._slot is not None:
+            self._pool._free_slots.put(self._slot)
+            self._slot = None
+
+class RenderPool(object):
+    # Renders frames in worker processes, each with its own off-screen
+    # RenderTexture. `render` is called in the worker as
+    # render(target, scene, frame, context), where context is whatever
+    # initializer(*initargs) returned when the worker started (for loading
+    # textures and fonts once). render, initializer and scenes have to be
+    # picklable.
+    #
+    # Pixels come back through a fixed set of shared memory slots rather than
+    # the result queue, so only (frame, slot) pairs get pickled. Workers still
+    # need a display to create a GL context; for headless use run under Xvfb.
+
+    def __init__(self, render, width, height, processes=None, slots=None, initializer=None, initargs=()):
+        self.width = width
+        self.height = height
+        self.processes = processes or os.cpu_count() or 1
+        slots = slots or 2 * self.processes
+        context = multiprocessing.get_context('spawn')
+        self._slots = [multiprocessing.shared_memory.SharedMemory(create=True, size=width * height * 4)
+                       for i in range(slots)]
+        self._free_slots = context.Queue()
+        for i in range(slots):
+            self._free_slots.put(i)
+        self._jobs = context.Queue()
+        self._results = context.Queue()
+        self._next_job = 0
+        self._workers = []
+        for i in range(self.processes):
+            worker = context.Process(target=_worker,
+                                     args=(render, initializer, initargs, width, height,
+                                           [slot.name for slot in self._slots],
+                                           self._free_slots, self._jobs, self._results))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def render(self, scene, frames, chunk_size=4):
+        # Yields a RenderedFrame for each frame in `frames` as soon as it's
+        # done, in completion order. Only one render() should be running at a
+        # time.
+        if not self._workers:
+            raise ValueError("render pool is closed")
+        frames = list(frames)
+        job_id = self._next_job
+        self._next_job += 1
+        for start in range(0, len(frames), chunk_size):
+            self._jobs.put((job_id, scene, frames[start:start + chunk_size]))
+        remaining = len(frames)
+        while remaining:
+            try:
+                result_job, frame, slot, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("a render worker exited unexpectedly")
+                continue
+            if result_job is None:
+                raise RuntimeError("render worker failed to start:\n" + error)
+            if result_job != job_id:
+                # Left over from a render() that was abandoned early.
+                if slot is not None:
+                    self._free_slots.put(slot)
+                continue
+            remaining -= 1
+            if error is not None:
+                raise RuntimeError("rendering frame %r failed:\n%s" % (frame, error))
+            yield RenderedFrame(self, frame, slot)
+
+    def close(self):
+        if self._workers:
+            for worker in self._workers:
+                self._jobs.put(None)
+            for worker in self._workers:
+                worker.join(5)
+                if worker.is_alive():
+                    worker.terminate()
+            self._workers = []
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
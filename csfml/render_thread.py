@@ -0,0 +1,166 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import concurrent.futures
+import threading
+
+class CommandList(object):
+    def __init__(self):
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def add(self, function, *args):
+        self._commands.append((function, args))
+
+    def clear(self):
+        del self._commands[:]
+
+    def execute(self):
+        for function, args in self._commands:
+            function(*args)
+
+class RenderThread(object):
+    # Moves a window's GL context to a dedicated thread. The caller records
+    # the next frame into `commands` while the render thread executes the
+    # previous one, then calls submit() to swap buffers; submit() only waits
+    # if the render thread is still busy with the frame before that. Commands
+    # run later and on another thread, so anything they reference must not
+    # be modified by the caller until the frame after next.
+
+    def __init__(self, window, display=True):
+        self.window = window
+        self.display = display
+        self.frames = 0
+        self.error = None
+        self._lists = [CommandList(), CommandList()]
+        self._recording = 0
+        self._pending = None
+        self._tasks = collections.deque()
+        self._running = True
+        self._cond = threading.Condition()
+        window.set_active(False)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def commands(self):
+        return self._lists[self._recording]
+
+    def add(self, function, *args):
+        self._lists[self._recording].add(function, *args)
+
+    def _wait_idle(self):
+        while self._pending is not None and self._running:
+            self._cond.wait()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self):
+        with self._cond:
+            self._wait_idle()
+            self._raise_error()
+            if not self._running:
+                raise RuntimeError("render thread has stopped")
+            self._pending = self._lists[self._recording]
+            self._recording ^= 1
+            self._lists[self._recording].clear()
+            self._cond.notify_all()
+
+    def wait_idle(self):
+        with self._cond:
+            self._wait_idle()
+            self._raise_error()
+
+    def invoke(self, function, *args):
+        # Runs function on the render thread (with the context active) before
+        # the next frame, for things like creating textures.
+        future = concurrent.futures.Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("render thread has stopped")
+            self._tasks.append((future, function, args))
+            self._cond.notify_all()
+        return future
+
+    def _run_tasks(self):
+        while True:
+            with self._cond:
+                if not self._tasks:
+                    return
+                future, function, args = self._tasks.popleft()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+    def _run(self):
+        self.window.set_active(True)
+        try:
+            while True:
+                with self._cond:
+                    while self._pending is None and not self._tasks and self._running:
+                        self._cond.wait()
+                    if self._pending is None and not self._tasks:
+                        break
+                    commands = self._pending
+                self._run_tasks()
+                if commands is None:
+                    continue
+                try:
+                    commands.execute()
+                    if self.display:
+                        self.window.display()
+                except Exception as e:
+                    self.error = e
+                with self._cond:
+                    self._pending = None
+                    self.frames += 1
+                    self._cond.notify_all()
+        except BaseException as e:
+            # Anything else kills the thread; hand it to the next waiter.
+            self.error = e
+            raise
+        finally:
+            with self._cond:
+                self._running = False
+                tasks, self._tasks = self._tasks, collections.deque()
+                self._cond.notify_all()
+            for future, function, args in tasks:
+                future.cancel()
+            self.window.set_active(False)
+
+    def stop(self):
+        if self._thread is not None:
+            with self._cond:
+                self._wait_idle()
+                self._running = False
+                self._cond.notify_all()
+            self._thread.join()
+            self._thread = None
+            self.window.set_active(True)
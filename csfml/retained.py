@@ -0,0 +1,231 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+
+import csfml
+import csfml.graphics
+
+# Rectangles here are (x0, y0, x1, y1) tuples of whole pixels.
+
+def _to_pixels(bounds, width, height):
+    # Rounds outwards, with a pixel to spare for antialiased edges.
+    x0 = max(0, int(math.floor(bounds.left)) - 1)
+    y0 = max(0, int(math.floor(bounds.top)) - 1)
+    x1 = min(width, int(math.ceil(bounds.left + bounds.width)) + 1)
+    y1 = min(height, int(math.ceil(bounds.top + bounds.height)) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1, y1)
+
+def _area(r):
+    return (r[2] - r[0]) * (r[3] - r[1])
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _touches(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def merge_rects(rects, max_rects):
+    # Merges overlapping rectangles, then keeps merging the pair that adds
+    # the least area until at most max_rects are left.
+    rects = list(rects)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _touches(rects[i], rects[j]):
+                    rects[i] = _union(rects[i], rects.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+    while len(rects) > max_rects:
+        best = None
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                cost = _area(_union(rects[i], rects[j])) - _area(rects[i]) - _area(rects[j])
+                if best is None or cost < best[0]:
+                    best = (cost, i, j)
+        cost, i, j = best
+        rects[i] = _union(rects[i], rects.pop(j))
+    return rects
+
+class _Item(object):
+    def __init__(self, drawable, states, bounds):
+        self.drawable = drawable
+        self.states = states
+        self.bounds = bounds
+        self.rect = None
+
+class RetainedRenderer(object):
+    # Redraws a mostly static scene by regions. The frame is kept in an
+    # off-screen RenderTexture; each render() works out which screen
+    # rectangles changed since the last one, redraws only the items touching
+    # them (clipped to each rectangle through the view's viewport), and
+    # copies only those rectangles to the window. When nothing changed it
+    # neither draws nor presents.
+    #
+    # Items' global bounds are compared every render(), so moving or resizing
+    # is picked up automatically; call invalidate(drawable) for changes that
+    # keep the bounds the same. Items are drawn in the order they were added
+    # and assume the window's default view.
+    #
+    # `buffers` is how many frames the window's back buffer lags behind (2
+    # for ordinary double buffering): each copy also covers the rectangles of
+    # the previous buffers - 1 frames. Use buffers=None to always copy the
+    # whole frame when the swap behaviour isn't known.
+
+    def __init__(self, window, background=None, max_rects=8, full_redraw_ratio=0.6, buffers=2):
+        self.window = window
+        self.background = csfml.graphics.Color.black if background is None else background
+        self.max_rects = max_rects
+        self.full_redraw_ratio = full_redraw_ratio
+        self.buffers = buffers
+        self.dirty_rects = []
+        self.frames = 0
+        self.skipped_frames = 0
+        self._items = []
+        self._by_drawable = {}
+        self._pending = []
+        self._history = []
+        self._full = True
+        self._cache = None
+        self._width = self._height = 0
+        self._quad = (csfml.graphics.Vertex * 4)()
+        self._view = csfml.graphics.View()
+        self._clear_states = csfml.graphics.RenderStates(csfml.graphics.BlendMode.BlendNone)
+
+    def add(self, drawable, states=None, bounds=None):
+        # `bounds` is a function returning the drawable's FloatRect on
+        # screen; it defaults to drawable.get_global_bounds.
+        if bounds is None:
+            bounds = drawable.get_global_bounds
+        item = _Item(drawable, states, bounds)
+        self._items.append(item)
+        self._by_drawable[id(drawable)] = item
+        return item
+
+    def remove(self, drawable):
+        item = self._by_drawable.pop(id(drawable))
+        self._items.remove(item)
+        if item.rect is not None:
+            self._pending.append(item.rect)
+
+    def invalidate(self, drawable=None):
+        if drawable is None:
+            self._full = True
+            return
+        item = self._by_drawable[id(drawable)]
+        if item.rect is not None:
+            self._pending.append(item.rect)
+        item.rect = None
+
+    def invalidate_rect(self, rect):
+        rect = _to_pixels(rect, self._width, self._height)
+        if rect is not None:
+            self._pending.append(rect)
+
+    def _check_size(self):
+        size = self.window.get_size()
+        if self._cache is None or (size.x, size.y) != (self._width, self._height):
+            self._width, self._height = size.x, size.y
+            self._cache = csfml.graphics.RenderTexture(size.x, size.y)
+            self._blit = csfml.graphics.Sprite()
+            self._blit.set_texture(self._cache.get_texture(), True)
+            self._full = True
+            self._history = []
+
+    def _collect(self):
+        rects = self._pending
+        self._pending = []
+        width, height = self._width, self._height
+        for item in self._items:
+            rect = _to_pixels(item.bounds(), width, height)
+            if rect != item.rect:
+                if item.rect is not None:
+                    rects.append(item.rect)
+                if rect is not None:
+                    rects.append(rect)
+                item.rect = rect
+        return rects
+
+    def _redraw(self, rect):
+        x0, y0, x1, y1 = rect
+        width, height = self._width, self._height
+        view = self._view
+        view.reset(csfml.graphics.FloatRect(x0, y0, x1 - x0, y1 - y0))
+        view.set_viewport(csfml.graphics.FloatRect(float(x0) / width, float(y0) / height,
+                                                   float(x1 - x0) / width, float(y1 - y0) / height))
+        cache = self._cache
+        cache.set_view(view)
+        # clear() ignores the viewport, so paint the background instead.
+        quad = self._quad
+        for vertex, (x, y) in zip(quad, ((x0, y0), (x1, y0), (x1, y1), (x0, y1))):
+            vertex.position.x = x
+            vertex.position.y = y
+            vertex.color = self.background
+        cache.draw_primitives(quad, 4, csfml.graphics.PrimitiveType.Quads, self._clear_states)
+        for item in self._items:
+            r = item.rect
+            if r is not None and r[0] < x1 and x0 < r[2] and r[1] < y1 and y0 < r[3]:
+                cache.draw(item.drawable, item.states)
+
+    def render(self):
+        # Returns True if the window was updated.
+        self._check_size()
+        rects = self._collect()
+        width, height = self._width, self._height
+        if not self._full and not rects:
+            self.dirty_rects = []
+            self.skipped_frames += 1
+            return False
+
+        screen = (0, 0, width, height)
+        if self._full:
+            redraw = [screen]
+        else:
+            redraw = merge_rects(rects, self.max_rects)
+            if sum(_area(r) for r in redraw) > self.full_redraw_ratio * width * height:
+                redraw = [screen]
+        self._full = False
+        for rect in redraw:
+            self._redraw(rect)
+        self._cache.display()
+        self.dirty_rects = redraw
+
+        # Copy to the window everything that changed in this frame or in the
+        # frames the back buffer hasn't seen yet.
+        if self.buffers is None or redraw == [screen]:
+            copy = [screen]
+        else:
+            copy = merge_rects([r for rects in self._history for r in rects] + redraw, self.max_rects)
+        if self.buffers is not None:
+            self._history.append(redraw)
+            keep = self.buffers - 1
+            self._history = self._history[-keep:] if keep else []
+
+        window = self.window
+        window.set_view(window.get_default_view())
+        blit = self._blit
+        for x0, y0, x1, y1 in copy:
+            blit.set_texture_rect(csfml.graphics.IntRect(x0, y0, x1 - x0, y1 - y0))
+            blit.set_position(x0, y0)
+            window.draw(blit)
+        window.display()
+        self.frames += 1
+        return True
@@ -0,0 +1,217 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import hashlib
+import os
+import threading
+import weakref
+
+import csfml
+import csfml.graphics
+
+def _encode(source):
+    if source is None or isinstance(source, bytes):
+        return source
+    return source.encode('utf-8')
+
+def _source_hash(vertex, fragment):
+    h = hashlib.sha256()
+    for source in (vertex, fragment):
+        if source is None:
+            h.update(b'\1')
+        else:
+            h.update(b'\0' + len(source).to_bytes(8, 'little') + source)
+    return h.digest()
+
+def _read(path):
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _mtimes(paths):
+    result = []
+    for path in paths:
+        if path is None:
+            result.append(None)
+        else:
+            try:
+                st = os.stat(path)
+                result.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                result.append(None)
+    return tuple(result)
+
+class ShaderHandle(object):
+    # What the registry hands out. `shader` is swapped for the recompiled
+    # program after a successful reload, so look it up when drawing rather
+    # than holding on to it.
+
+    def __init__(self, key, shader, paths=None):
+        self.key = key
+        self.shader = shader
+        self.paths = paths
+        self.generation = 0
+        self.error = None
+        self._mtimes = None
+
+    def bind(self):
+        self.shader.bind()
+
+class ShaderRegistry(object):
+    # Shares one compiled Shader among everyone asking for the same
+    # (vertex, fragment) source, and watches the files behind from_file
+    # shaders. Memory and file shaders get separate handles even when the
+    # source matches, so reloading a file never changes what a from_memory
+    # caller draws with; they only share the compiled program. A changed file
+    # is re-read and recompiled on the watcher thread (SFML gives that thread
+    # its own shared context), or left for poll() on the render thread if
+    # background=False. If compilation fails the old program simply stays in
+    # place.
+    #
+    # Listeners are called as listener(handle, ok) after each reload attempt.
+
+    def __init__(self, watch_interval=0.5, background=True):
+        self.watch_interval = watch_interval
+        self.background = background
+        self.reloads = 0
+        self.failures = 0
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._by_hash = {}
+        self._by_paths = {}
+        self._programs = weakref.WeakValueDictionary()
+        self._pending = collections.deque()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _compile(self, vertex, fragment, key):
+        with self._lock:
+            shader = self._programs.get(key)
+        if shader is not None:
+            return shader
+        shader = csfml.graphics.Shader.from_memory(vertex, fragment)
+        if not shader.value:
+            return None
+        with self._lock:
+            return self._programs.setdefault(key, shader)
+
+    def from_memory(self, vertex=None, fragment=None):
+        vertex = _encode(vertex)
+        fragment = _encode(fragment)
+        key = _source_hash(vertex, fragment)
+        with self._lock:
+            handle = self._by_hash.get(key)
+        if handle is not None:
+            return handle
+        shader = self._compile(vertex, fragment, key)
+        if shader is None:
+            raise ValueError("shader failed to compile")
+        with self._lock:
+            return self._by_hash.setdefault(key, ShaderHandle(key, shader))
+
+    def from_file(self, vertex_path=None, fragment_path=None):
+        paths = tuple(None if p is None else os.path.realpath(p) for p in (vertex_path, fragment_path))
+        with self._lock:
+            handle = self._by_paths.get(paths)
+        if handle is not None:
+            return handle
+        mtimes = _mtimes(paths)
+        vertex, fragment = [_read(p) for p in paths]
+        key = _source_hash(vertex, fragment)
+        shader = self._compile(vertex, fragment, key)
+        if shader is None:
+            raise ValueError("shader failed to compile: %r, %r" % (vertex_path, fragment_path))
+        handle = ShaderHandle(key, shader, paths)
+        handle._mtimes = mtimes
+        with self._lock:
+            handle = self._by_paths.setdefault(paths, handle)
+        self._start_watching()
+        return handle
+
+    def _start_watching(self):
+        if self._thread is None and self.watch_interval is not None:
+            self._thread = threading.Thread(target=self._watch)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            self.check()
+
+    def check(self):
+        with self._lock:
+            handles = list(self._by_paths.values())
+        for handle in handles:
+            mtimes = _mtimes(handle.paths)
+            if mtimes == handle._mtimes:
+                continue
+            handle._mtimes = mtimes
+            try:
+                vertex, fragment = [_read(p) for p in handle.paths]
+            except (IOError, OSError) as e:
+                # Probably caught mid-save; the next change will retry.
+                handle.error = e
+                continue
+            key = _source_hash(vertex, fragment)
+            if key == handle.key:
+                continue
+            if self.background:
+                self._reload(handle, key, vertex, fragment)
+            else:
+                self._pending.append((handle, key, vertex, fragment))
+
+    def poll(self, limit=1):
+        # Compiles up to `limit` queued reloads on the calling thread.
+        done = 0
+        while done < limit and self._pending:
+            self._reload(*self._pending.popleft())
+            done += 1
+        return done
+
+    def _reload(self, handle, key, vertex, fragment):
+        try:
+            shader = self._compile(vertex, fragment, key)
+        except Exception as e:
+            shader = None
+            handle.error = e
+        if shader is None:
+            if handle.error is None:
+                handle.error = ValueError("shader failed to compile")
+            self.failures += 1
+            ok = False
+        else:
+            with self._lock:
+                handle.key = key
+                handle.shader = shader
+                handle.generation += 1
+                handle.error = None
+            self.reloads += 1
+            ok = True
+        for listener in list(self.listeners):
+            listener(handle, ok)
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
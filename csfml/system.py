@@ -13,7 +13,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import array
+import atexit
+import bisect
+import collections
 import ctypes
+import time
 
 import csfml
 
@@ -23,6 +28,209 @@ Bool = ctypes.c_int
 
 Enum = ctypes.c_int
 
+class ReleaseQueue(object):
+    # Native objects dropped while a window is alive are queued here instead of
+    # being destroyed from __del__, which may run on any thread at any point in
+    # a frame. Windows and render textures flush the queue after display().
+    # SFML shares resources between all of its contexts, so one queue per
+    # process is normally enough. Windows stop deferring once closed; when the
+    # last one goes, and at interpreter exit, whatever is left is destroyed.
+
+    def __init__(self):
+        self._pending = collections.deque()
+        self._users = 0
+        self.released = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def enable(self):
+        self._users += 1
+
+    def disable(self):
+        self._users -= 1
+        if self._users <= 0:
+            self._users = 0
+            self.flush()
+
+    def defer(self, destroy, handle):
+        if self._users:
+            self._pending.append((destroy, handle))
+        else:
+            destroy(handle)
+
+    def flush(self, budget=None):
+        pending = self._pending
+        if budget is not None:
+            deadline = time.perf_counter() + budget
+        count = 0
+        while pending:
+            destroy, handle = pending.popleft()
+            destroy(handle)
+            count += 1
+            if budget is not None and time.perf_counter() >= deadline:
+                break
+        self.released += count
+        return count
+
+    def drain(self):
+        # Stops deferring and destroys everything still queued.
+        self._users = 0
+        self.flush()
+
+release_queue = ReleaseQueue()
+atexit.register(release_queue.drain)
+
+class Time(ctypes.Structure):
+    _fields_ = [('microseconds', ctypes.c_int64)]
+
+    def __repr__(self):
+        return 'csfml.system.Time(%s)' % self.microseconds
+
+    def as_seconds(self):
+        return csystem.sfTime_asSeconds(self)
+
+    def as_milliseconds(self):
+        return csystem.sfTime_asMilliseconds(self)
+
+    def as_microseconds(self):
+        return csystem.sfTime_asMicroseconds(self)
+
+    def __add__(self, oth):
+        return Time(self.microseconds + oth.microseconds)
+
+    def __sub__(self, oth):
+        return Time(self.microseconds - oth.microseconds)
+
+    def __eq__(self, oth):
+        return isinstance(oth, Time) and self.microseconds == oth.microseconds
+
+    def __ne__(self, oth):
+        return not self == oth
+
+    def __lt__(self, oth):
+        return self.microseconds < oth.microseconds
+
+    def __le__(self, oth):
+        return self.microseconds <= oth.microseconds
+
+    def __gt__(self, oth):
+        return self.microseconds > oth.microseconds
+
+    def __ge__(self, oth):
+        return self.microseconds >= oth.microseconds
+
+    __hash__ = None
+
+def seconds(amount):
+    return csystem.sfSeconds(amount)
+
+def milliseconds(amount):
+    return csystem.sfMilliseconds(amount)
+
+def microseconds(amount):
+    return csystem.sfMicroseconds(amount)
+
+def sleep(duration):
+    if not isinstance(duration, Time):
+        duration = csystem.sfSeconds(duration)
+    csystem.sfSleep(duration)
+
+class Clock(ctypes.c_void_p):
+    def __init__(self):
+        result = csystem.sfClock_create()
+        self.value = result.value
+        result.value = 0
+
+    def copy(self):
+        return csystem.sfClock_copy(self)
+
+    def __del__(self):
+        if self.value != 0:
+            csystem.sfClock_destroy(self)
+            self.value = 0
+
+    def get_elapsed_time(self):
+        return csystem.sfClock_getElapsedTime(self)
+
+    elapsed_time = property(get_elapsed_time)
+
+    def restart(self):
+        return csystem.sfClock_restart(self)
+
+class FrameTimer(object):
+    # Keeps the last `size` frame durations in a preallocated ring, plus a
+    # running histogram, so tick() does no bookkeeping allocations. Sorting for
+    # percentiles only happens when they are asked for.
+
+    default_buckets = (0.004, 0.008, 0.0125, 0.0167, 0.025, 0.0334, 0.05, 0.1, 0.25)
+
+    def __init__(self, size=240, hitch_threshold=1.0/30, buckets=default_buckets):
+        self.size = size
+        self.hitch_threshold = hitch_threshold
+        self._edges = tuple(buckets)
+        self._clock = Clock()
+        self._durations = array.array('d', bytes(8 * size))
+        self._histogram = array.array('L', bytes(array.array('L').itemsize * (len(self._edges) + 1)))
+        self._index = 0
+        self.frames = 0
+        self.hitches = 0
+
+    def reset(self):
+        self._clock.restart()
+        for i in range(self.size):
+            self._durations[i] = 0.0
+        for i in range(len(self._histogram)):
+            self._histogram[i] = 0
+        self._index = 0
+        self.frames = 0
+        self.hitches = 0
+
+    def start(self):
+        self._clock.restart()
+
+    def tick(self):
+        duration = _clock_restart_microseconds(self._clock) * 0.000001
+        index = self._index
+        self._durations[index] = duration
+        index += 1
+        self._index = 0 if index == self.size else index
+        self.frames += 1
+        self._histogram[bisect.bisect_right(self._edges, duration)] += 1
+        if duration > self.hitch_threshold:
+            self.hitches += 1
+        return duration
+
+    def get_durations(self):
+        if self.frames < self.size:
+            return self._durations[:self.frames]
+        return self._durations[self._index:] + self._durations[:self._index]
+
+    def get_percentiles(self, percentiles=(50, 95, 99)):
+        durations = sorted(self.get_durations())
+        if not durations:
+            return [0.0] * len(percentiles)
+        last = len(durations) - 1
+        return [durations[min(last, int(round(p / 100.0 * last)))] for p in percentiles]
+
+    def get_mean(self):
+        durations = self.get_durations()
+        if not durations:
+            return 0.0
+        return sum(durations) / len(durations)
+
+    def get_histogram(self):
+        return list(zip(self._edges + (None,), self._histogram))
+
+    def get_stats(self):
+        p50, p95, p99 = self.get_percentiles()
+        return {'frames': self.frames,
+                'hitches': self.hitches,
+                'mean': self.get_mean(),
+                'p50': p50,
+                'p95': p95,
+                'p99': p99}
+
 class _InputStream(ctypes.Structure):
     ReadFunc = ctypes.CFUNCTYPE(ctypes.c_int64,
                                 ctypes.c_void_p, #data
@@ -45,6 +253,13 @@ class _InputStream(ctypes.Structure):
                 ('_get_size', GetSizeFunc),
                 ('_userdata', ctypes.c_void_p)]
 
+def _vector(cls, args):
+    # Lets setters take an existing vector as their only argument and pass it
+    # through as-is, rather than building a new one from its components.
+    if len(args) == 1 and type(args[0]) is cls:
+        return args[0]
+    return cls(*args)
+
 class Vector2f(ctypes.Structure):
     _fields_ = [('x', ctypes.c_float), ('y', ctypes.c_float)]
 
@@ -135,3 +350,49 @@ class Vector3u(ctypes.Structure):
     def __repr__(self):
         return 'csfml.system.Vector3u(%s, %s, %s)' % (repr(self.x), repr(self.y). repr(self.z))
 
+Time.zero = Time.in_dll(csystem, 'sfTime_Zero')
+
+csystem.sfTime_asSeconds.argtypes = [Time]
+csystem.sfTime_asSeconds.restype = ctypes.c_float
+
+csystem.sfTime_asMilliseconds.argtypes = [Time]
+csystem.sfTime_asMilliseconds.restype = ctypes.c_int32
+
+csystem.sfTime_asMicroseconds.argtypes = [Time]
+csystem.sfTime_asMicroseconds.restype = ctypes.c_int64
+
+csystem.sfSeconds.argtypes = [ctypes.c_float]
+csystem.sfSeconds.restype = Time
+
+csystem.sfMilliseconds.argtypes = [ctypes.c_int32]
+csystem.sfMilliseconds.restype = Time
+
+csystem.sfMicroseconds.argtypes = [ctypes.c_int64]
+csystem.sfMicroseconds.restype = Time
+
+csystem.sfSleep.argtypes = [Time]
+csystem.sfSleep.restype = None
+
+csystem.sfClock_create.argtypes = []
+csystem.sfClock_create.restype = Clock
+
+csystem.sfClock_copy.argtypes = [Clock]
+csystem.sfClock_copy.restype = Clock
+
+csystem.sfClock_destroy.argtypes = [Clock]
+csystem.sfClock_destroy.restype = None
+
+csystem.sfClock_getElapsedTime.argtypes = [Clock]
+csystem.sfClock_getElapsedTime.restype = Time
+
+csystem.sfClock_restart.argtypes = [Clock]
+csystem.sfClock_restart.restype = Time
+
+if ctypes.sizeof(ctypes.c_void_p) == 8:
+    # sfTime is a struct holding a single sfInt64, which the 64-bit ABIs
+    # (x86-64 System V and Windows, AArch64) return exactly like a bare
+    # sfInt64. Reading it as one skips building a Time on every call.
+    _clock_restart_microseconds = ctypes.CFUNCTYPE(ctypes.c_int64, Clock)(('sfClock_restart', csystem))
+else:
+    def _clock_restart_microseconds(clock):
+        return csystem.sfClock_restart(clock).microseconds
@@ -0,0 +1,267 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import collections
+import socket
+import threading
+import time
+import weakref
+
+import csfml
+
+_counters = ('draw_calls', 'vertices', 'texture_uploads', 'upload_bytes', 'events')
+
+FrameRecord = collections.namedtuple('FrameRecord', ('frame', 'frame_time') + _counters)
+
+class _Counters(threading.local):
+    # Running totals for the current thread. Only the owning thread ever
+    # writes them, so the increments need no lock; end_frame() reads every
+    # thread's totals and diffs them against the previous frame.
+
+    def __init__(self, telemetry):
+        for name in _counters:
+            setattr(self, name, 0)
+        telemetry._register(self.__dict__)
+
+class Telemetry(object):
+    # Per-frame counters filled in by the bindings themselves: draw calls
+    # and vertices from the render targets' draw methods, texture uploads
+    # from Texture.update_*, events from poll_event/wait_event, and frame
+    # time between display() calls. The last `size` frames are kept in a
+    # ring buffer.
+    #
+    # Counting always happens (it's an integer add on `counters`, which is
+    # per thread, so draws on a render thread and events on the logic thread
+    # don't lose each other's updates); the ring and exporters only run while
+    # enabled. Every `export_interval` frames the new records are handed to
+    # each exporter's export(records).
+
+    def __init__(self, size=600, export_interval=60):
+        self.size = size
+        self.export_interval = export_interval
+        self.enabled = False
+        self.frame = 0
+        self.exporters = []
+        self._frame_times = array.array('d', [0.0]) * size
+        self._rings = dict((name, array.array('Q', [0]) * size) for name in _counters)
+        self._last = None
+        self._threads = {}
+        self._threads_lock = threading.Lock()
+        # Totals of threads that have finished.
+        self._retired = dict((name, 0) for name in _counters)
+        self.counters = _Counters(self)
+        self._totals = self._sum()
+
+    def _register(self, counts):
+        with self._threads_lock:
+            self._threads[id(counts)] = counts
+        # Once the thread is gone its totals can't change any more, so fold
+        # them into _retired rather than summing a dead thread every frame.
+        weakref.finalize(threading.current_thread(), self._retire, id(counts))
+
+    def _retire(self, key):
+        with self._threads_lock:
+            counts = self._threads.pop(key)
+            for name in _counters:
+                self._retired[name] += counts[name]
+
+    def _sum(self):
+        with self._threads_lock:
+            return [self._retired[name] + sum(counts[name] for counts in self._threads.values())
+                    for name in _counters]
+
+    def enable(self):
+        self._totals = self._sum()
+        self._last = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def __len__(self):
+        return min(self.frame, self.size)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        i = self.frame % self.size
+        self._frame_times[i] = now - self._last
+        self._last = now
+        totals = self._sum()
+        for name, total, previous in zip(_counters, totals, self._totals):
+            self._rings[name][i] = total - previous
+        self._totals = totals
+        self.frame += 1
+        if self.exporters and self.frame % self.export_interval == 0:
+            records = self.get_frames(self.export_interval)
+            for exporter in self.exporters:
+                exporter.export(records)
+
+    def _order(self, count):
+        # Ring indices of the last `count` frames, oldest first.
+        count = len(self) if count is None else min(count, len(self))
+        return [(self.frame - count + k) % self.size for k in range(count)]
+
+    def get_series(self, name, count=None):
+        ring = self._frame_times if name == 'frame_time' else self._rings[name]
+        return [ring[i] for i in self._order(count)]
+
+    def get_frames(self, count=None):
+        order = self._order(count)
+        first = self.frame - len(order)
+        rings = [self._rings[name] for name in _counters]
+        return [FrameRecord(first + k, self._frame_times[i], *[ring[i] for ring in rings])
+                for k, i in enumerate(order)]
+
+    def get_stats(self):
+        n = len(self)
+        if not n:
+            return {}
+        frame_times = self.get_series('frame_time')
+        result = {'frames': n,
+                  'mean_frame_time': sum(frame_times) / n,
+                  'max_frame_time': max(frame_times)}
+        for name in _counters:
+            result['mean_' + name] = float(sum(self.get_series(name))) / n
+        return result
+
+telemetry = Telemetry()
+
+class FileExporter(object):
+    # Appends one tab-separated line per frame.
+
+    def __init__(self, filename):
+        self._file = open(filename, 'a')
+        if self._file.tell() == 0:
+            self._file.write('\t'.join(FrameRecord._fields) + '\n')
+
+    def export(self, records):
+        self._file.write(''.join('%d\t%.6f\t%s\n' % (r.frame, r.frame_time, '\t'.join(str(v) for v in r[2:]))
+                                 for r in records))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class StatsDExporter(object):
+    # Sends StatsD metrics over UDP: each frame time as a timing, the
+    # counters summed over the batch, and the batch's frame rate as a gauge.
+    # Metrics are packed into as few datagrams as fit in max_packet bytes.
+    # Send errors are dropped; telemetry must never hold up a frame.
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='csfml', max_packet=1400):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.max_packet = max_packet
+        self.dropped = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def _lines(self, records):
+        prefix = self.prefix
+        for r in records:
+            yield '%s.frame_time:%.3f|ms' % (prefix, r.frame_time * 1000)
+        for k, name in enumerate(_counters):
+            yield '%s.%s:%d|c' % (prefix, name, sum(r[2 + k] for r in records))
+        total = sum(r.frame_time for r in records)
+        if total > 0:
+            yield '%s.fps:%.2f|g' % (prefix, len(records) / total)
+
+    def export(self, records):
+        packet = []
+        size = 0
+        for line in self._lines(records):
+            if packet and size + len(line) + 1 > self.max_packet:
+                self._send(packet)
+                packet = []
+                size = 0
+            packet.append(line)
+            size += len(line) + 1
+        if packet:
+            self._send(packet)
+
+    def _send(self, lines):
+        try:
+            self._socket.sendto('\n'.join(lines).encode('ascii'), self.address)
+        except OSError:
+            self.dropped += 1
+
+    def close(self):
+        self._socket.close()
+
+def _rgba(color):
+    return (color.r, color.g, color.b, color.a)
+
+class TelemetryOverlay(object):
+    # Draws a bar graph of one telemetry series (frame time by default) in
+    # screen space with a single draw call: a background, one bar per frame
+    # and a line at `target`. Bars over the target are drawn in `over_color`.
+    # Needs numpy.
+
+    def __init__(self, telemetry=telemetry, position=(8, 8), size=(240, 64), series='frame_time',
+                 target=1.0 / 60, over_color=None):
+        import csfml.graphics
+        self.telemetry = telemetry
+        self.position = position
+        self.size = size
+        self.series = series
+        self.target = target
+        self.background = csfml.graphics.Color(0, 0, 0, 160)
+        self.color = csfml.graphics.Color(80, 220, 80)
+        self.over_color = csfml.graphics.Color(230, 60, 60) if over_color is None else over_color
+        self._vertices = csfml.graphics.VertexArray(csfml.graphics.PrimitiveType.Quads)
+
+    def _quads(self, count):
+        import numpy
+        vertices = self._vertices
+        vertices.resize(4 * count)
+        return numpy, vertices.position.reshape((count, 4, 2)), vertices.color.reshape((count, 4, 4))
+
+    def draw(self, target, states=None):
+        x, y = self.position
+        width, height = self.size
+        values = self.telemetry.get_series(self.series, int(width))
+        n = len(values)
+        numpy, position, color = self._quads(n + 2)
+
+        # Quad 0 is the background, 1 the target line, the rest the bars.
+        scale = height / (2.0 * self.target)
+        position[0] = ((x, y), (x + width, y), (x + width, y + height), (x, y + height))
+        color[0] = _rgba(self.background)
+        line_y = y + height - self.target * scale
+        position[1] = ((x, line_y), (x + width, line_y), (x + width, line_y + 1), (x, line_y + 1))
+        color[1] = (255, 255, 255, 128)
+        if n:
+            values = numpy.asarray(values, numpy.float32)
+            bar = float(width) / len(values)
+            left = x + numpy.arange(n, dtype=numpy.float32) * bar
+            top = y + height - numpy.minimum(values * scale, height)
+            bottom = y + height
+            bars = position[2:]
+            bars[:, 0, 0] = bars[:, 3, 0] = left
+            bars[:, 1, 0] = bars[:, 2, 0] = left + bar
+            bars[:, 0, 1] = bars[:, 1, 1] = top
+            bars[:, 2, 1] = bars[:, 3, 1] = bottom
+            over = values > self.target
+            color[2:] = numpy.where(over[:, None, None], _rgba(self.over_color), _rgba(self.color))
+
+        view = target.get_view()
+        target.set_view(target.get_default_view())
+        try:
+            self._vertices.draw(target, states)
+        finally:
+            target.set_view(view)
@@ -0,0 +1,239 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import math
+
+import numpy
+
+import csfml
+import csfml.graphics
+
+class _Chunk(object):
+    def __init__(self):
+        self.dirty = True
+        self.animated = False
+        self.tiles = None
+        self.vertices = None
+        self.pointer = None
+        self.count = 0
+
+class _Layer(object):
+    def __init__(self, indices, chunks_x, chunks_y):
+        self.indices = indices
+        self.visible = True
+        self.chunks = [[_Chunk() for cx in range(chunks_x)] for cy in range(chunks_y)]
+
+class TileMap(object):
+    # Tile indices are ints into the tileset, numbered left to right and top
+    # to bottom; negative means no tile. Each layer is split into
+    # chunk_size x chunk_size chunks with their own vertex buffer, only chunks
+    # inside the target's view are drawn, and an edit only rebuilds the chunk
+    # it lands in.
+    #
+    # `remap` maps tile indices to the tileset tile actually shown. Changing
+    # it (directly via set_remap, or through animate/update) only rewrites
+    # texture coordinates; chunk geometry stays as it is.
+
+    def __init__(self, tileset, tile_size, indices, chunk_size=32):
+        self.tileset = tileset
+        self.tile_width, self.tile_height = tile_size
+        self.chunk_size = chunk_size
+        size = tileset.get_size()
+        self.tiles_per_row = max(1, size.x // self.tile_width)
+        tile_count = self.tiles_per_row * max(1, size.y // self.tile_height)
+        self.remap = numpy.arange(tile_count, dtype=numpy.int32)
+        self.layers = []
+        self._animations = {}
+        self._states = csfml.graphics.RenderStates(texture=tileset)
+        self.drawn_chunks = 0
+        self.add_layer(indices)
+
+    @property
+    def height(self):
+        return self.layers[0].indices.shape[0]
+
+    @property
+    def width(self):
+        return self.layers[0].indices.shape[1]
+
+    def _check_indices(self, indices):
+        if indices.size and indices.max() >= len(self.remap):
+            raise ValueError("tile index %d is out of range for a tileset of %d tiles" % (indices.max(), len(self.remap)))
+
+    def add_layer(self, indices):
+        indices = numpy.asarray(indices, dtype=numpy.int32)
+        if indices.ndim != 2:
+            raise ValueError("tile indices must be a 2D array")
+        self._check_indices(indices)
+        if self.layers and indices.shape != self.layers[0].indices.shape:
+            raise ValueError("all layers must have the same shape")
+        chunks_y = -(-indices.shape[0] // self.chunk_size)
+        chunks_x = -(-indices.shape[1] // self.chunk_size)
+        self.layers.append(_Layer(indices.copy(), chunks_x, chunks_y))
+        return len(self.layers) - 1
+
+    def get_tile(self, x, y, layer=0):
+        return int(self.layers[layer].indices[y, x])
+
+    def set_tile(self, x, y, index, layer=0):
+        if index >= len(self.remap):
+            raise ValueError("tile index %d is out of range for a tileset of %d tiles" % (index, len(self.remap)))
+        layer = self.layers[layer]
+        layer.indices[y, x] = index
+        layer.chunks[y // self.chunk_size][x // self.chunk_size].dirty = True
+
+    def set_tiles(self, x, y, indices, layer=0):
+        indices = numpy.asarray(indices, dtype=numpy.int32)
+        self._check_indices(indices)
+        layer = self.layers[layer]
+        layer.indices[y:y + indices.shape[0], x:x + indices.shape[1]] = indices
+        cs = self.chunk_size
+        for cy in range(y // cs, (y + indices.shape[0] - 1) // cs + 1):
+            for cx in range(x // cs, (x + indices.shape[1] - 1) // cs + 1):
+                layer.chunks[cy][cx].dirty = True
+
+    def set_remap(self, remap):
+        self.remap[:] = remap
+        self._refresh_tex_coords(False)
+
+    def animate(self, tile, frames, frame_duration):
+        self._animations[tile] = [list(frames), frame_duration, 0.0, 0]
+        self.remap[tile] = frames[0]
+        # Built chunks holding the tile just need their texture coordinates
+        # redone (and to be picked up by update() from now on).
+        for layer in self.layers:
+            for row in layer.chunks:
+                for chunk in row:
+                    if chunk.dirty or chunk.count == 0:
+                        continue
+                    if (chunk.tiles == tile).any():
+                        chunk.animated = True
+                        self._set_tex_coords(chunk)
+
+    def stop_animation(self, tile):
+        if self._animations.pop(tile, None) is not None:
+            self.remap[tile] = tile
+            self._refresh_tex_coords(True)
+
+    def update(self, dt):
+        changed = False
+        for tile, animation in self._animations.items():
+            frames, frame_duration, elapsed, frame = animation
+            elapsed += dt
+            if elapsed >= frame_duration:
+                steps = int(elapsed // frame_duration)
+                elapsed -= steps * frame_duration
+                frame = (frame + steps) % len(frames)
+                self.remap[tile] = frames[frame]
+                changed = True
+            animation[2] = elapsed
+            animation[3] = frame
+        if changed:
+            self._refresh_tex_coords(True)
+
+    def _refresh_tex_coords(self, animated_only):
+        for layer in self.layers:
+            for row in layer.chunks:
+                for chunk in row:
+                    if chunk.dirty or chunk.count == 0:
+                        continue
+                    if animated_only and not chunk.animated:
+                        continue
+                    self._set_tex_coords(chunk)
+
+    def _set_tex_coords(self, chunk):
+        shown = self.remap[chunk.tiles]
+        u = (shown % self.tiles_per_row).astype(numpy.float32) * self.tile_width
+        v = (shown // self.tiles_per_row).astype(numpy.float32) * self.tile_height
+        tex_coords = chunk.vertices['tex_coords']
+        tex_coords[0::4, 0] = u
+        tex_coords[0::4, 1] = v
+        tex_coords[1::4, 0] = u + self.tile_width
+        tex_coords[1::4, 1] = v
+        tex_coords[2::4, 0] = u + self.tile_width
+        tex_coords[2::4, 1] = v + self.tile_height
+        tex_coords[3::4, 0] = u
+        tex_coords[3::4, 1] = v + self.tile_height
+
+    def _build_chunk(self, layer, cx, cy):
+        chunk = layer.chunks[cy][cx]
+        cs = self.chunk_size
+        block = layer.indices[cy * cs:(cy + 1) * cs, cx * cs:(cx + 1) * cs]
+        rows, cols = numpy.nonzero(block >= 0)
+        chunk.dirty = False
+        chunk.count = len(rows) * 4
+        if not len(rows):
+            chunk.tiles = chunk.vertices = chunk.pointer = None
+            chunk.animated = False
+            return
+        chunk.tiles = block[rows, cols]
+        chunk.animated = bool(self._animations) and bool(numpy.isin(chunk.tiles, list(self._animations)).any())
+        vertices = numpy.empty(chunk.count, csfml.graphics.vertex_dtype)
+        x = ((cols + cx * cs) * self.tile_width).astype(numpy.float32)
+        y = ((rows + cy * cs) * self.tile_height).astype(numpy.float32)
+        position = vertices['position']
+        position[0::4, 0] = x
+        position[0::4, 1] = y
+        position[1::4, 0] = x + self.tile_width
+        position[1::4, 1] = y
+        position[2::4, 0] = x + self.tile_width
+        position[2::4, 1] = y + self.tile_height
+        position[3::4, 0] = x
+        position[3::4, 1] = y + self.tile_height
+        vertices['color'] = 255
+        chunk.vertices = vertices
+        chunk.pointer = vertices.ctypes.data_as(ctypes.POINTER(csfml.graphics.Vertex))
+        self._set_tex_coords(chunk)
+
+    def get_visible_chunks(self, view):
+        center = view.get_center()
+        size = view.get_size()
+        half_width = abs(size.x) / 2.0
+        half_height = abs(size.y) / 2.0
+        if view.get_rotation() % 360 != 0:
+            half_width = half_height = math.hypot(half_width, half_height)
+        chunk_width = self.chunk_size * self.tile_width
+        chunk_height = self.chunk_size * self.tile_height
+        chunks_y = len(self.layers[0].chunks)
+        chunks_x = len(self.layers[0].chunks[0])
+        x0 = max(0, int(math.floor((center.x - half_width) / chunk_width)))
+        y0 = max(0, int(math.floor((center.y - half_height) / chunk_height)))
+        x1 = min(chunks_x - 1, int(math.floor((center.x + half_width) / chunk_width)))
+        y1 = min(chunks_y - 1, int(math.floor((center.y + half_height) / chunk_height)))
+        return x0, y0, x1, y1
+
+    def draw(self, target, states=None):
+        # Culling assumes the map is drawn without an extra transform.
+        x0, y0, x1, y1 = self.get_visible_chunks(target.get_view())
+        render_states = self._states
+        if states is not None:
+            render_states = csfml.graphics.RenderStates(states.blend_mode, states.transform, self.tileset, states.shader)
+        draw_primitives = target.draw_primitives
+        quads = csfml.graphics.PrimitiveType.Quads
+        drawn = 0
+        for layer in self.layers:
+            if not layer.visible:
+                continue
+            for cy in range(y0, y1 + 1):
+                row = layer.chunks[cy]
+                for cx in range(x0, x1 + 1):
+                    chunk = row[cx]
+                    if chunk.dirty:
+                        self._build_chunk(layer, cx, cy)
+                    if chunk.count:
+                        draw_primitives(chunk.pointer, chunk.count, quads, render_states)
+                        drawn += 1
+        self.drawn_chunks = drawn
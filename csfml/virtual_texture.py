@@ -0,0 +1,218 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import ctypes
+import math
+import threading
+
+import csfml
+import csfml.graphics
+
+class _Tile(object):
+    def __init__(self, texture, sprite, nbytes):
+        self.texture = texture
+        self.sprite = sprite
+        self.nbytes = nbytes
+
+class VirtualTexture(object):
+    # Draws an image too big to be a single texture by splitting it into
+    # tile_size x tile_size tiles and only keeping the ones near the view on
+    # the GPU. `source` is an Image or a filename; it is decoded once and kept
+    # in memory, and tiles are cut out of it on a background thread. The
+    # render thread then uploads at most `uploads_per_frame` finished tiles
+    # per draw, nearest to the view center first.
+    #
+    # Resident tiles are evicted least recently drawn first once they take up
+    # more than `budget` bytes, but never while they're on screen. With
+    # smooth=True each tile carries a one pixel border from its neighbours so
+    # filtering doesn't show seams.
+
+    def __init__(self, source, tile_size=512, budget=256 * 1024 * 1024, margin=1,
+                 uploads_per_frame=4, smooth=False):
+        if isinstance(source, csfml.graphics.Image):
+            image = source
+        else:
+            image = csfml.graphics.Image.from_file(source)
+            if not image.value:
+                raise IOError("failed to load image from %r" % source)
+        size = image.get_size()
+        self.width = size.x
+        self.height = size.y
+        self.tile_size = tile_size
+        self.budget = budget
+        self.margin = margin
+        self.uploads_per_frame = uploads_per_frame
+        self.smooth = smooth
+        self.tiles_x = -(-self.width // tile_size)
+        self.tiles_y = -(-self.height // tile_size)
+        self.resident_bytes = 0
+        self.drawn_tiles = 0
+        self._image = image
+        self._pixels = image.get_pixels_ptr()
+        self._resident = collections.OrderedDict()
+        self._ready = {}
+        self._wanted = []
+        self._loading = None
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _tile_source(self, tx, ty):
+        # Returns the source rectangle to copy for a tile (with its border)
+        # and where the tile proper starts inside it.
+        border = 1 if self.smooth else 0
+        x0 = tx * self.tile_size
+        y0 = ty * self.tile_size
+        x1 = min(self.width, x0 + self.tile_size)
+        y1 = min(self.height, y0 + self.tile_size)
+        sx0 = max(0, x0 - border)
+        sy0 = max(0, y0 - border)
+        sx1 = min(self.width, x1 + border)
+        sy1 = min(self.height, y1 + border)
+        return (sx0, sy0, sx1 - sx0, sy1 - sy0), csfml.graphics.IntRect(x0 - sx0, y0 - sy0, x1 - x0, y1 - y0)
+
+    def _cut(self, key):
+        (x, y, width, height), inner = self._tile_source(*key)
+        row = width * 4
+        stride = self.width * 4
+        buffer = (ctypes.c_uint8 * (row * height))()
+        base = ctypes.addressof(buffer)
+        source = self._pixels + y * stride + x * 4
+        for i in range(height):
+            ctypes.memmove(base + i * row, source + i * stride, row)
+        return buffer, width, height, inner
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._wanted:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                key = self._wanted.pop(0)
+                self._loading = key
+            data = self._cut(key)
+            with self._cond:
+                self._ready[key] = data
+                self._loading = None
+
+    def get_visible_tiles(self, view, margin=0):
+        center = view.get_center()
+        size = view.get_size()
+        half_width = abs(size.x) / 2.0
+        half_height = abs(size.y) / 2.0
+        if view.get_rotation() % 360 != 0:
+            half_width = half_height = math.hypot(half_width, half_height)
+        ts = self.tile_size
+        x0 = max(0, int(math.floor((center.x - half_width) / ts)) - margin)
+        y0 = max(0, int(math.floor((center.y - half_height) / ts)) - margin)
+        x1 = min(self.tiles_x - 1, int(math.floor((center.x + half_width) / ts)) + margin)
+        y1 = min(self.tiles_y - 1, int(math.floor((center.y + half_height) / ts)) + margin)
+        return x0, y0, x1, y1
+
+    def update(self, view):
+        # Requests missing tiles around the view and uploads finished ones.
+        # Returns the keys of the tiles on screen.
+        x0, y0, x1, y1 = self.get_visible_tiles(view)
+        visible = [(tx, ty) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)]
+        px0, py0, px1, py1 = self.get_visible_tiles(view, self.margin)
+        center = view.get_center()
+        ts = self.tile_size
+
+        def distance(key):
+            return (abs((key[0] + 0.5) * ts - center.x) + abs((key[1] + 0.5) * ts - center.y))
+
+        with self._cond:
+            wanted = [(tx, ty) for ty in range(py0, py1 + 1) for tx in range(px0, px1 + 1)
+                      if (tx, ty) not in self._resident and (tx, ty) not in self._ready
+                      and (tx, ty) != self._loading]
+            wanted.sort(key=distance)
+            self._wanted = wanted
+            # Tiles that scrolled out of the prefetch area before their upload
+            # aren't worth keeping.
+            for key in list(self._ready):
+                if not (px0 <= key[0] <= px1 and py0 <= key[1] <= py1):
+                    del self._ready[key]
+            ready = sorted(self._ready, key=distance)[:self.uploads_per_frame]
+            ready = [(key, self._ready.pop(key)) for key in ready]
+            if wanted:
+                self._cond.notify()
+
+        for key, data in ready:
+            self._upload(key, data)
+
+        for key in visible:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+        self._evict(set(visible))
+        return visible
+
+    def _upload(self, key, data):
+        buffer, width, height, inner = data
+        texture = csfml.graphics.Texture(width, height)
+        texture.update_from_pixels(buffer, width, height, 0, 0)
+        texture.set_smooth(self.smooth)
+        sprite = csfml.graphics.Sprite()
+        sprite.set_texture(texture)
+        sprite.set_texture_rect(inner)
+        sprite.set_position(key[0] * self.tile_size, key[1] * self.tile_size)
+        self._resident[key] = _Tile(texture, sprite, width * height * 4)
+        self.resident_bytes += width * height * 4
+
+    def _evict(self, keep):
+        if self.resident_bytes <= self.budget:
+            return
+        for key in list(self._resident):
+            if self.resident_bytes <= self.budget:
+                break
+            if key in keep:
+                continue
+            tile = self._resident.pop(key)
+            self.resident_bytes -= tile.nbytes
+
+    def is_resident(self, tx, ty):
+        return (tx, ty) in self._resident
+
+    def draw(self, target, states=None):
+        # Like TileMap, culling assumes no extra transform.
+        visible = self.update(target.get_view())
+        resident = self._resident
+        drawn = 0
+        for key in visible:
+            tile = resident.get(key)
+            if tile is not None:
+                target.draw(tile.sprite, states)
+                drawn += 1
+        self.drawn_tiles = drawn
+
+    def close(self):
+        if self._thread is not None:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            self._thread.join()
+            self._thread = None
+        self._resident.clear()
+        self._ready.clear()
+        self.resident_bytes = 0
@@ -13,17 +13,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import array
+import asyncio
 import ctypes
+import os
+import socket
+import stat
+import struct
+import sys
+import time
 
 import csfml
 import csfml.system
+import csfml.telemetry
 
 cwindow = ctypes.CDLL(csfml.module_format % 'window')
+_telemetry = csfml.telemetry.telemetry
 
 WindowHandle = csfml.window_handle_type
 
+_utf32_codec = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
 def _to_utf32(s):
-    return ctypes.c_char_p(s.encode('utf32'))
+    return ctypes.c_char_p((s + '\0').encode(_utf32_codec))
 
 class ContextSettings(ctypes.Structure):
     _fields_ = [('depth_bits', ctypes.c_uint),
@@ -45,7 +57,7 @@ class KeyEvent(ctypes.Structure):
 
 class TextEvent(ctypes.Structure):
     _fields_ = [('type', csfml.system.Enum),
-                ('unicode', ctypes.POINTER(ctypes.c_uint32))]
+                ('unicode', ctypes.c_uint32)]
 
 class MouseMoveEvent(ctypes.Structure):
     _fields_ = [('type', csfml.system.Enum),
@@ -141,6 +153,348 @@ class Event(ctypes.Union):
                 return getattr(self, field_name)
         return self
 
+class Keyboard(csfml.system.Enum):
+    Unknown = -1
+    A = 0
+    B = 1
+    C = 2
+    D = 3
+    E = 4
+    F = 5
+    G = 6
+    H = 7
+    I = 8
+    J = 9
+    K = 10
+    L = 11
+    M = 12
+    N = 13
+    O = 14
+    P = 15
+    Q = 16
+    R = 17
+    S = 18
+    T = 19
+    U = 20
+    V = 21
+    W = 22
+    X = 23
+    Y = 24
+    Z = 25
+    Num0 = 26
+    Num1 = 27
+    Num2 = 28
+    Num3 = 29
+    Num4 = 30
+    Num5 = 31
+    Num6 = 32
+    Num7 = 33
+    Num8 = 34
+    Num9 = 35
+    Escape = 36
+    LControl = 37
+    LShift = 38
+    LAlt = 39
+    LSystem = 40
+    RControl = 41
+    RShift = 42
+    RAlt = 43
+    RSystem = 44
+    Menu = 45
+    LBracket = 46
+    RBracket = 47
+    SemiColon = 48
+    Comma = 49
+    Period = 50
+    Quote = 51
+    Slash = 52
+    BackSlash = 53
+    Tilde = 54
+    Equal = 55
+    Dash = 56
+    Space = 57
+    Return = 58
+    BackSpace = 59
+    Tab = 60
+    PageUp = 61
+    PageDown = 62
+    End = 63
+    Home = 64
+    Insert = 65
+    Delete = 66
+    Add = 67
+    Subtract = 68
+    Multiply = 69
+    Divide = 70
+    Left = 71
+    Right = 72
+    Up = 73
+    Down = 74
+    Numpad0 = 75
+    Numpad1 = 76
+    Numpad2 = 77
+    Numpad3 = 78
+    Numpad4 = 79
+    Numpad5 = 80
+    Numpad6 = 81
+    Numpad7 = 82
+    Numpad8 = 83
+    Numpad9 = 84
+    F1 = 85
+    F2 = 86
+    F3 = 87
+    F4 = 88
+    F5 = 89
+    F6 = 90
+    F7 = 91
+    F8 = 92
+    F9 = 93
+    F10 = 94
+    F11 = 95
+    F12 = 96
+    F13 = 97
+    F14 = 98
+    F15 = 99
+    Pause = 100
+    KeyCount = 101
+
+class Mouse(csfml.system.Enum):
+    Left = 0
+    Right = 1
+    Middle = 2
+    XButton1 = 3
+    XButton2 = 4
+    ButtonCount = 5
+
+class Joystick(csfml.system.Enum):
+    Count = 8
+    ButtonCount = 32
+    AxisCount = 8
+
+    X = 0
+    Y = 1
+    Z = 2
+    R = 3
+    U = 4
+    V = 5
+    PovX = 6
+    PovY = 7
+
+def _test_bit(bits, index, count):
+    # Codes outside the range (Keyboard.Unknown is -1) are never down.
+    return 0 <= index < count and (bits >> index) & 1 == 1
+
+class InputState(object):
+    # A snapshot of keyboard, mouse and joystick state built from the event
+    # stream. Buttons are bits in an int and axes live in a flat float array.
+    # feed() also sets a pressed or released bit for every transition it sees,
+    # so a press and release within the same frame still both register.
+    # Call feed() for each event, then new_frame() once per frame before
+    # feeding the next batch.
+
+    def __init__(self):
+        self._axis_count = Joystick.Count * Joystick.AxisCount
+        self._keys = self._pressed_keys = self._released_keys = 0
+        self._buttons = self._pressed_buttons = self._released_buttons = 0
+        self._joystick_buttons = self._pressed_joystick_buttons = self._released_joystick_buttons = 0
+        self._axes = array.array('f', bytes(4 * self._axis_count))
+        self._previous_axes = array.array('f', bytes(4 * self._axis_count))
+        self.mouse_x = self.mouse_y = 0
+        self.mouse_wheel = 0
+        self.has_focus = True
+
+    def new_frame(self):
+        self._pressed_keys = self._released_keys = 0
+        self._pressed_buttons = self._released_buttons = 0
+        self._pressed_joystick_buttons = self._released_joystick_buttons = 0
+        self._previous_axes[:] = self._axes
+        self.mouse_wheel = 0
+
+    def release_all(self):
+        self._released_keys |= self._keys
+        self._released_buttons |= self._buttons
+        self._released_joystick_buttons |= self._joystick_buttons
+        self._keys = 0
+        self._buttons = 0
+        self._joystick_buttons = 0
+
+    def feed(self, event):
+        if isinstance(event, Event):
+            event = event.get_specific_event()
+        event_type = event.type
+        if event_type == Event.KeyPressed:
+            if 0 <= event.code < Keyboard.KeyCount:
+                self._keys |= 1 << event.code
+                self._pressed_keys |= 1 << event.code
+        elif event_type == Event.KeyReleased:
+            if 0 <= event.code < Keyboard.KeyCount:
+                self._keys &= ~(1 << event.code)
+                self._released_keys |= 1 << event.code
+        elif event_type == Event.MouseMoved:
+            self.mouse_x = event.x
+            self.mouse_y = event.y
+        elif event_type == Event.MouseButtonPressed:
+            self._buttons |= 1 << event.button
+            self._pressed_buttons |= 1 << event.button
+            self.mouse_x = event.x
+            self.mouse_y = event.y
+        elif event_type == Event.MouseButtonReleased:
+            self._buttons &= ~(1 << event.button)
+            self._released_buttons |= 1 << event.button
+            self.mouse_x = event.x
+            self.mouse_y = event.y
+        elif event_type == Event.MouseWheelMoved:
+            self.mouse_wheel += event.delta
+        elif event_type == Event.JoystickMoved:
+            if event.joystick_id < Joystick.Count:
+                self._axes[event.joystick_id * Joystick.AxisCount + event.axis] = event.position
+        elif event_type == Event.JoystickButtonPressed:
+            if event.joystick_id < Joystick.Count:
+                bit = 1 << (event.joystick_id * Joystick.ButtonCount + event.button)
+                self._joystick_buttons |= bit
+                self._pressed_joystick_buttons |= bit
+        elif event_type == Event.JoystickButtonReleased:
+            if event.joystick_id < Joystick.Count:
+                bit = 1 << (event.joystick_id * Joystick.ButtonCount + event.button)
+                self._joystick_buttons &= ~bit
+                self._released_joystick_buttons |= bit
+        elif event_type == Event.JoystickDisconnected:
+            if event.joystick_id < Joystick.Count:
+                mask = ((1 << Joystick.ButtonCount) - 1) << (event.joystick_id * Joystick.ButtonCount)
+                self._released_joystick_buttons |= self._joystick_buttons & mask
+                self._joystick_buttons &= ~mask
+                base = event.joystick_id * Joystick.AxisCount
+                for i in range(base, base + Joystick.AxisCount):
+                    self._axes[i] = 0.0
+        elif event_type == Event.LostFocus:
+            # We won't see the releases for anything held while unfocused.
+            self.has_focus = False
+            self.release_all()
+        elif event_type == Event.GainedFocus:
+            self.has_focus = True
+
+    def is_key_down(self, code):
+        return _test_bit(self._keys, code, Keyboard.KeyCount)
+
+    def was_key_pressed(self, code):
+        return _test_bit(self._pressed_keys, code, Keyboard.KeyCount)
+
+    def was_key_released(self, code):
+        return _test_bit(self._released_keys, code, Keyboard.KeyCount)
+
+    def is_button_down(self, button):
+        return _test_bit(self._buttons, button, Mouse.ButtonCount)
+
+    def was_button_pressed(self, button):
+        return _test_bit(self._pressed_buttons, button, Mouse.ButtonCount)
+
+    def was_button_released(self, button):
+        return _test_bit(self._released_buttons, button, Mouse.ButtonCount)
+
+    def get_mouse_position(self):
+        return csfml.system.Vector2i(self.mouse_x, self.mouse_y)
+
+    def _test_joystick_bit(self, bits, joystick, button):
+        if not 0 <= joystick < Joystick.Count:
+            return False
+        return _test_bit(bits >> (joystick * Joystick.ButtonCount), button, Joystick.ButtonCount)
+
+    def is_joystick_button_down(self, joystick, button):
+        return self._test_joystick_bit(self._joystick_buttons, joystick, button)
+
+    def was_joystick_button_pressed(self, joystick, button):
+        return self._test_joystick_bit(self._pressed_joystick_buttons, joystick, button)
+
+    def was_joystick_button_released(self, joystick, button):
+        return self._test_joystick_bit(self._released_joystick_buttons, joystick, button)
+
+    def get_axis(self, joystick, axis):
+        return self._axes[joystick * Joystick.AxisCount + axis]
+
+    def get_previous_axis(self, joystick, axis):
+        return self._previous_axes[joystick * Joystick.AxisCount + axis]
+
+class EventDispatcher(object):
+    # Handlers live in a flat table indexed by event type, so dispatch is a
+    # list index and a loop. With coalesce on, runs of MouseMoved, Resized and
+    # JoystickMoved (per stick and axis) events within one batch collapse to
+    # the latest, as long as no other kind of event came in between.
+
+    _coalescable = frozenset((Event.MouseMoved, Event.Resized, Event.JoystickMoved))
+
+    def __init__(self, coalesce=False):
+        self.coalesce = coalesce
+        self.default = None
+        self.dispatched = 0
+        self.coalesced = 0
+        self._table = [[] for field_name in Event._event_type_fields]
+
+    def connect(self, event_type, handler):
+        self._table[event_type].append(handler)
+
+    def disconnect(self, event_type, handler):
+        self._table[event_type].remove(handler)
+
+    def on(self, event_type):
+        def decorator(handler):
+            self.connect(event_type, handler)
+            return handler
+        return decorator
+
+    def dispatch(self, event):
+        # Takes either a raw Event or the specific event poll_event returns;
+        # handlers always get the specific one.
+        event_type = event.type
+        if isinstance(event, Event):
+            event = event.get_specific_event()
+        if 0 <= event_type < len(self._table):
+            handlers = self._table[event_type]
+            if handlers:
+                for handler in handlers:
+                    handler(event)
+                self.dispatched += 1
+                return
+        if self.default is not None:
+            self.default(event)
+            self.dispatched += 1
+
+    def _coalesce_key(self, event):
+        if event.type == Event.JoystickMoved:
+            return (Event.JoystickMoved, event.joystick_move.joystick_id, event.joystick_move.axis)
+        return event.type
+
+    def poll(self, window, max_events=None):
+        # `window` is anything with poll_raw_event: a Window, a RenderWindow,
+        # an EventRecorder or an EventReplay.
+        pending = []
+        latest = {}
+        poll_raw_event = window.poll_raw_event
+        coalesce = self.coalesce
+        coalescable = self._coalescable
+        while max_events is None or len(pending) < max_events:
+            event = Event()
+            if not poll_raw_event(event):
+                break
+            if coalesce:
+                if event.type in coalescable:
+                    key = self._coalesce_key(event)
+                    index = latest.get(key)
+                    if index is not None:
+                        pending[index] = event
+                        self.coalesced += 1
+                        continue
+                    latest[key] = len(pending)
+                elif latest:
+                    latest.clear()
+            pending.append(event)
+        return pending
+
+    def dispatch_pending(self, window, max_events=None):
+        events = self.poll(window, max_events)
+        for event in events:
+            self.dispatch(event)
+        return len(events)
+
 class Style(csfml.system.Enum):
     NoStyle = 0
     Titlebar = 1 << 0
@@ -177,22 +531,46 @@ class VideoMode(ctypes.Structure):
         return [ptr[i] for i in range(count.value)]
 
 class Window(ctypes.c_void_p):
+    release_queue = csfml.system.release_queue
+
+    # Seconds per frame spent destroying queued native objects after display().
+    release_budget = 0.002
+
     def __init__(self, mode, title, style=Style.Default, settings=ContextSettings()):
         result = cwindow.sfWindow_createUnicode(mode, _to_utf32(title), style, ctypes.byref(settings))
         self.value = result.value
         result.value = 0
+        if self.value:
+            self._defer_releases(True)
 
     @staticmethod
     def from_handle(self, handle, settings):
-        return cwindow.sfWindow_createFromHandle(handle, ctypes.byref(settings))
+        result = cwindow.sfWindow_createFromHandle(handle, ctypes.byref(settings))
+        if result.value:
+            result._defer_releases(True)
+        return result
+
+    _deferring = False
+
+    def _defer_releases(self, deferring):
+        # A window holds the release queue open from creation until it is
+        # closed or destroyed, whichever comes first.
+        if deferring != self._deferring:
+            self._deferring = deferring
+            if deferring:
+                self.release_queue.enable()
+            else:
+                self.release_queue.disable()
 
     def __del__(self):
         if self.value != 0:
             cwindow.sfWindow_destroy(self)
             self.value = 0
+            self._defer_releases(False)
 
     def close(self):
         cwindow.sfWindow_close(self)
+        self._defer_releases(False)
 
     def is_open(self):
         return bool(cwindow.sfWindow_isOpen(self))
@@ -202,21 +580,42 @@ class Window(ctypes.c_void_p):
 
     settings = property(get_settings)
 
+    def poll_raw_event(self, event):
+        # Like poll_event, but fills in a caller-provided Event and returns
+        # whether there was one, without converting it.
+        if cwindow.sfWindow_pollEvent(self, ctypes.byref(event)):
+            _telemetry.counters.events += 1
+            return True
+        return False
+
+    def wait_raw_event(self, event):
+        if cwindow.sfWindow_waitEvent(self, ctypes.byref(event)):
+            _telemetry.counters.events += 1
+            return True
+        return False
+
     def poll_event(self):
         result = Event()
-        if cwindow.sfWindow_pollEvent(self, ctypes.byref(result)):
+        if self.poll_raw_event(result):
             return result.get_specific_event()
 
     def wait_event(self):
         result = Event()
-        if cwindow.sfWindow_waitEvent(self, ctypes.byref(result)):
+        if self.wait_raw_event(result):
             return result.get_specific_event()
 
+    def events(self, fd=None, min_interval=0.001, max_interval=0.016):
+        # Waits on `fd` if given, otherwise on the X connection if one can be
+        # found (see find_display_fd); with neither it polls with backoff.
+        if fd is None:
+            fd = find_display_fd()
+        return _EventIterator(self, fd, min_interval, max_interval)
+
     def get_position(self):
         return cwindow.sfWindow_getPosition(self)
 
     def set_position(self, *position):
-        cwindow.sfWindow_setPosition(self, csfml.system.Vector2i(*position))
+        cwindow.sfWindow_setPosition(self, csfml.system._vector(csfml.system.Vector2i, position))
 
     position = property(get_position, set_position)
 
@@ -224,7 +623,7 @@ class Window(ctypes.c_void_p):
         return cwindow.sfWindow_getSize(self)
 
     def set_size(self, *size):
-        cwindow.sfWindow_setSize(self, csfml.system.Vector2u(*size))
+        cwindow.sfWindow_setSize(self, csfml.system._vector(csfml.system.Vector2u, size))
 
     size = property(get_size, set_size)
 
@@ -251,6 +650,9 @@ class Window(ctypes.c_void_p):
 
     def display(self):
         cwindow.sfWindow_display(self)
+        _telemetry.end_frame()
+        if self.release_queue:
+            self.release_queue.flush(self.release_budget)
 
     def set_framerate_limit(self, limit):
         cwindow.sfWindow_setFramerateLimit(self, limit)
@@ -261,6 +663,384 @@ class Window(ctypes.c_void_p):
     def get_system_handle(self):
         return cwindow.sfWindow_getSystemHandle(self)
 
+def _display_addresses(display):
+    # The socket addresses an X client connects to for a DISPLAY value.
+    host, sep, rest = display.rpartition(':')
+    number = rest.partition('.')[0]
+    if not sep or not number.isdigit():
+        return []
+    if host in ('', 'unix'):
+        return ['/tmp/.X11-unix/X' + number]
+    try:
+        infos = socket.getaddrinfo(host, 6000 + int(number), 0, socket.SOCK_STREAM)
+    except OSError:
+        return []
+    return [info[4][:2] for info in infos]
+
+def _find_socket_fd(addresses):
+    # Returns the first open fd that is a socket connected to one of
+    # `addresses`, without taking ownership of it.
+    try:
+        names = os.listdir('/proc/self/fd')
+    except OSError:
+        return None
+    for name in names:
+        fd = int(name)
+        try:
+            if not stat.S_ISSOCK(os.fstat(fd).st_mode):
+                continue
+            sock = socket.socket(fileno=fd)
+        except OSError:
+            continue
+        try:
+            peer = sock.getpeername()
+        except OSError:
+            peer = None
+        finally:
+            sock.detach()
+        if isinstance(peer, bytes):
+            # Abstract unix addresses come back as bytes with a leading NUL.
+            peer = peer.lstrip(b'\0').decode('utf-8', 'replace')
+        elif isinstance(peer, str):
+            peer = peer.lstrip('\0')
+        elif isinstance(peer, tuple):
+            peer = peer[:2]
+        if peer in addresses:
+            return fd
+    return None
+
+def find_display_fd(display=None):
+    # CSFML doesn't expose SFML's X connection, but it is an ordinary socket
+    # connected to the server named by $DISPLAY, so look for it among the
+    # process's open fds. Only works on Linux, and only once a window is
+    # open; if the process has several connections to the same server the
+    # first one found is used (any of them being readable just means an
+    # early poll). Returns None when there's nothing to watch.
+    if display is None:
+        display = os.environ.get('DISPLAY')
+    if not display:
+        return None
+    addresses = _display_addresses(display)
+    if not addresses:
+        return None
+    return _find_socket_fd(addresses)
+
+class _EventIterator(object):
+    # Xlib may already have read events off the socket into its own queue, so
+    # the fd going quiet doesn't mean there's nothing to poll. We always drain
+    # poll_event() first and never wait on the fd longer than max_interval.
+
+    def __init__(self, window, fd, min_interval, max_interval):
+        self.window = window
+        self.fd = fd
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        interval = self.min_interval
+        woken = False
+        while True:
+            event = self.window.poll_event()
+            if event is not None:
+                return event
+            if not self.window.is_open():
+                raise StopAsyncIteration
+            if self.fd is not None and not woken:
+                try:
+                    woken = await self._wait_readable()
+                    continue
+                except NotImplementedError:
+                    # e.g. the proactor loop on Windows
+                    self.fd = None
+            # The fd was readable but produced no event (a partial read, or
+            # traffic that isn't for us), so back off instead of spinning.
+            woken = False
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_interval)
+
+    async def _wait_readable(self):
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+        loop.add_reader(self.fd, on_readable)
+        try:
+            await asyncio.wait_for(readable, self.max_interval)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(self.fd)
+
+class FrameTicker(object):
+    # `dt = await ticker.tick()` in a rendering coroutine wakes it once per
+    # frame while leaving the event loop free for other work in between.
+
+    def __init__(self, frame_rate=60):
+        self.period = 1.0 / frame_rate
+        self.late_frames = 0
+        self._next = None
+        self._last = None
+
+    async def tick(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._next is None:
+            self._next = self._last = now
+        self._next += self.period
+        if self._next < now:
+            self.late_frames += 1
+            self._next = now
+        else:
+            await asyncio.sleep(self._next - now)
+        now = loop.time()
+        dt = now - self._last
+        self._last = now
+        return dt
+
+class MainLoop(object):
+    # Runs update(step) at a fixed rate and render(alpha) once per frame, where
+    # alpha is how far we are between the last two updates (for interpolation).
+    # At most max_steps updates run per frame; time beyond that is dropped
+    # rather than accumulated, so a slow frame can't snowball.
+
+    # time.sleep() can overshoot by a scheduler tick, so we wake this much
+    # early and spin for the rest.
+    spin = 0.016 if sys.platform == 'win32' else 0.002
+
+    def __init__(self, window, update, render, step=1.0/60, frame_rate=None, max_steps=5, max_events=64, handle_event=None):
+        self.window = window
+        self.update = update
+        self.render = render
+        self.step = step
+        self.frame_period = 1.0 / frame_rate if frame_rate else None
+        self.max_steps = max_steps
+        self.max_events = max_events
+        if handle_event is not None:
+            self.handle_event = handle_event
+        self.running = False
+        self.frames = 0
+        self.updates = 0
+        self.late_frames = 0
+        self.dropped_time = 0.0
+
+    def handle_event(self, event):
+        if event.type == Event.Closed:
+            self.window.close()
+
+    def stop(self):
+        self.running = False
+
+    def _drain_events(self):
+        poll_event = self.window.poll_event
+        handle_event = self.handle_event
+        for i in range(self.max_events):
+            event = poll_event()
+            if event is None:
+                break
+            handle_event(event)
+
+    def _wait_until(self, deadline):
+        clock = time.perf_counter
+        remaining = deadline - clock()
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while clock() < deadline:
+            pass
+
+    def run(self):
+        clock = time.perf_counter
+        window = self.window
+        step = self.step
+        max_steps = self.max_steps
+        accumulator = 0.0
+        previous = clock()
+        next_frame = previous
+        self.running = True
+        while self.running and window.is_open():
+            self._drain_events()
+
+            now = clock()
+            accumulator += now - previous
+            previous = now
+
+            steps = 0
+            while accumulator >= step and steps < max_steps:
+                self.update(step)
+                accumulator -= step
+                steps += 1
+            if accumulator >= step:
+                self.dropped_time += accumulator - accumulator % step
+                accumulator %= step
+            self.updates += steps
+
+            self.render(accumulator / step)
+            window.display()
+            self.frames += 1
+
+            if self.frame_period is not None:
+                next_frame += self.frame_period
+                now = clock()
+                if now > next_frame + 0.0005:
+                    # Too far behind to catch up without a burst of frames.
+                    self.late_frames += 1
+                    next_frame = now
+                else:
+                    self._wait_until(next_frame)
+        self.running = False
+
+_event_file_magic = b'CSFMLEV\x01'
+_event_file_header = struct.Struct('<8sI')
+_event_record_header = struct.Struct('<Id')
+
+class EventRecorder(object):
+    # Wraps a Window, logging every event it returns as the raw Event bytes
+    # tagged with the frame number (advanced by display()) and the time since
+    # recording started. Anything else is passed through to the window. After
+    # stop() events still pass through; they just aren't logged.
+
+    def __init__(self, window, filename):
+        self.window = window
+        self.frame = 0
+        self.recorded = 0
+        self._file = open(filename, 'wb')
+        self._file.write(_event_file_header.pack(_event_file_magic, ctypes.sizeof(Event)))
+        self._start = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self.window, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _record(self, event):
+        if self._file is None:
+            return
+        self._file.write(_event_record_header.pack(self.frame, time.perf_counter() - self._start))
+        self._file.write(bytes(event))
+        self.recorded += 1
+
+    def poll_raw_event(self, event):
+        if self.window.poll_raw_event(event):
+            self._record(event)
+            return True
+        return False
+
+    def wait_raw_event(self, event):
+        if self.window.wait_raw_event(event):
+            self._record(event)
+            return True
+        return False
+
+    def poll_event(self):
+        result = Event()
+        if self.poll_raw_event(result):
+            return result.get_specific_event()
+
+    def wait_event(self):
+        result = Event()
+        if self.wait_raw_event(result):
+            return result.get_specific_event()
+
+    def display(self):
+        self.window.display()
+        self.frame += 1
+
+    def stop(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class EventReplay(object):
+    # Plays back a file written by EventRecorder through the same
+    # poll_event/wait_event/display/is_open interface as a Window, with no
+    # display needed. In realtime mode events come out when their timestamp
+    # comes due; otherwise they are released frame by frame, as fast as the
+    # caller calls display().
+
+    def __init__(self, filename, realtime=False):
+        self.realtime = realtime
+        self.frame = 0
+        self._file = open(filename, 'rb')
+        magic, size = _event_file_header.unpack(self._file.read(_event_file_header.size))
+        if magic != _event_file_magic:
+            raise ValueError("%r is not an event recording" % filename)
+        if size != ctypes.sizeof(Event):
+            raise ValueError("%r was recorded with %d byte events, expected %d" % (filename, size, ctypes.sizeof(Event)))
+        self._record_size = _event_record_header.size + size
+        self._open = True
+        self._start = time.perf_counter()
+        self._next = self._read()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read(self):
+        if self._file is None:
+            return None
+        data = self._file.read(self._record_size)
+        if len(data) < self._record_size:
+            self._file.close()
+            self._file = None
+            return None
+        frame, timestamp = _event_record_header.unpack_from(data)
+        return frame, timestamp, Event.from_buffer_copy(data, _event_record_header.size)
+
+    def _take(self, out):
+        frame, timestamp, event = self._next
+        self._next = self._read()
+        ctypes.pointer(out)[0] = event
+        _telemetry.counters.events += 1
+        return True
+
+    def is_open(self):
+        return self._open and self._next is not None
+
+    def close(self):
+        self._open = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def poll_raw_event(self, out):
+        if not self._open or self._next is None:
+            return False
+        frame, timestamp, event = self._next
+        if self.realtime:
+            if timestamp > time.perf_counter() - self._start:
+                return False
+        elif frame > self.frame:
+            return False
+        return self._take(out)
+
+    def wait_raw_event(self, out):
+        if not self._open or self._next is None:
+            return False
+        frame, timestamp, event = self._next
+        if self.realtime:
+            delay = timestamp - (time.perf_counter() - self._start)
+            if delay > 0:
+                time.sleep(delay)
+        elif frame > self.frame:
+            self.frame = frame
+        return self._take(out)
+
+    poll_event = Window.poll_event
+    wait_event = Window.wait_event
+
+    def display(self):
+        self.frame += 1
+
 cwindow.sfVideoMode_getDesktopMode.argtypes = []
 cwindow.sfVideoMode_getDesktopMode.restype = VideoMode
 
@@ -0,0 +1,158 @@
+# Copyright 2014 Vincent Povirk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import ctypes
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+
+try:
+    import csfml.window
+except (ImportError, OSError, NotImplementedError):
+    # CSFML isn't installed (or this platform isn't supported)
+    csfml = None
+
+class _FakeWindow(object):
+    def __init__(self):
+        self.pending = []
+
+    def poll_event(self):
+        if self.pending:
+            return self.pending.pop(0)
+
+    def is_open(self):
+        return True
+
+@unittest.skipIf(csfml is None, "CSFML is not available")
+class EventFdTest(unittest.TestCase):
+    def test_waits_on_fd(self):
+        # With polling intervals this long, only the fd can deliver the
+        # event in time.
+        window = _FakeWindow()
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+        self.addCleanup(writer.close)
+        events = csfml.window._EventIterator(window, reader.fileno(), 10.0, 10.0)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            def deliver():
+                window.pending.append('event')
+                writer.send(b'x')
+            loop.call_later(0.05, deliver)
+            return await asyncio.wait_for(events.__anext__(), 2.0)
+
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(run()), 'event')
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "needs /proc/self/fd")
+    def test_find_socket_fd(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'X0')
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.unlink, path)
+        self.addCleanup(server.close)
+        server.bind(path)
+        server.listen(1)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(path)
+        self.assertEqual(csfml.window._find_socket_fd([path]), client.fileno())
+        self.assertIsNone(csfml.window._find_socket_fd([path + '-other']))
+        # The fd must still belong to the client afterwards.
+        client.send(b'x')
+
+    def test_display_addresses(self):
+        self.assertEqual(csfml.window._display_addresses(':1'), ['/tmp/.X11-unix/X1'])
+        self.assertEqual(csfml.window._display_addresses('unix:0.0'), ['/tmp/.X11-unix/X0'])
+        self.assertIn(('127.0.0.1', 6010), csfml.window._display_addresses('127.0.0.1:10.0'))
+        self.assertEqual(csfml.window._display_addresses('bogus'), [])
+
+@unittest.skipIf(csfml is None, "CSFML is not available")
+class InputStateTest(unittest.TestCase):
+    def feed_key(self, state, event_type, code):
+        event = csfml.window.KeyEvent()
+        event.type = event_type
+        event.code = code
+        state.feed(event)
+
+    def test_key_press_and_release(self):
+        state = csfml.window.InputState()
+        self.feed_key(state, csfml.window.Event.KeyPressed, csfml.window.Keyboard.A)
+        self.assertTrue(state.is_key_down(csfml.window.Keyboard.A))
+        self.assertTrue(state.was_key_pressed(csfml.window.Keyboard.A))
+        self.feed_key(state, csfml.window.Event.KeyReleased, csfml.window.Keyboard.A)
+        self.assertFalse(state.is_key_down(csfml.window.Keyboard.A))
+        self.assertTrue(state.was_key_released(csfml.window.Keyboard.A))
+        state.new_frame()
+        self.assertFalse(state.was_key_pressed(csfml.window.Keyboard.A))
+
+    def test_unknown_key(self):
+        state = csfml.window.InputState()
+        self.feed_key(state, csfml.window.Event.KeyPressed, csfml.window.Keyboard.Unknown)
+        self.assertFalse(state.is_key_down(csfml.window.Keyboard.Unknown))
+        self.assertFalse(state.was_key_pressed(csfml.window.Keyboard.Unknown))
+        self.assertFalse(state.was_key_released(csfml.window.Keyboard.Unknown))
+
+    def test_out_of_range(self):
+        state = csfml.window.InputState()
+        self.assertFalse(state.is_key_down(csfml.window.Keyboard.KeyCount))
+        self.assertFalse(state.is_button_down(-1))
+        self.assertFalse(state.was_button_pressed(csfml.window.Mouse.ButtonCount))
+        self.assertFalse(state.is_joystick_button_down(-1, 0))
+        self.assertFalse(state.is_joystick_button_down(0, -1))
+        self.assertFalse(state.was_joystick_button_released(0, csfml.window.Joystick.ButtonCount))
+
+@unittest.skipIf(csfml is None, "CSFML is not available")
+class EventRecorderTest(unittest.TestCase):
+    def test_record_and_replay(self):
+        window = _FakeWindow()
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'events')
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.unlink, path)
+
+        def raw_event(event):
+            specific = window.poll_event()
+            if specific is None:
+                return False
+            ctypes.memmove(ctypes.byref(event), ctypes.byref(specific), ctypes.sizeof(specific))
+            return True
+        window.poll_raw_event = raw_event
+
+        key = csfml.window.KeyEvent()
+        key.type = csfml.window.Event.KeyPressed
+        key.code = csfml.window.Keyboard.A
+        with csfml.window.EventRecorder(window, path) as recorder:
+            window.pending.append(key)
+            self.assertEqual(recorder.poll_event().code, csfml.window.Keyboard.A)
+        # Once stopped the recorder still passes events through.
+        window.pending.append(key)
+        self.assertEqual(recorder.poll_event().code, csfml.window.Keyboard.A)
+        self.assertEqual(recorder.recorded, 1)
+
+        with csfml.window.EventReplay(path) as replay:
+            self.assertEqual(replay.poll_event().code, csfml.window.Keyboard.A)
+            self.assertIsNone(replay.poll_event())
+        self.assertFalse(replay.is_open())
+
+if __name__ == '__main__':
+    unittest.main()